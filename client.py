@@ -4,6 +4,14 @@ import os
 BASE_URL = "http://127.0.0.1:8000/api"
 TOKEN_FILE = "token.txt"
 
+RATING_LABELS = {
+    1: "Unbearable",
+    2: "Bad",
+    3: "Decent",
+    4: "Smart",
+    5: "Excellent"
+}
+
 
 def save_token(token):
     with open(TOKEN_FILE, "w") as file:
@@ -94,48 +102,111 @@ def list_modules():
         print("❌ Failed to fetch modules:", response.status_code, response.json())
 
 
+def render_rating(average):
+    """Render a numeric average from the compact format as stars and a label."""
+    if average is None:
+        return "No ratings yet"
+    rounded = round(average)
+    return f"{'⭐' * rounded} ({RATING_LABELS.get(rounded, 'No ratings yet')})"
+
+
+def compact_rows(data):
+    """Turn a compact {"fields": [...], "rows": [[...]]} payload into a list of dicts."""
+    return [dict(zip(data["fields"], row)) for row in data["rows"]]
+
+
+def batch_query(queries, headers):
+    """Send several sub-requests to the batch endpoint in a single round trip."""
+    response = requests.post(f"{BASE_URL}/batch/", json={"queries": queries}, headers=headers)
+    if response.status_code != 200:
+        return None, response
+    return response.json()["results"], response
+
+
+def batch_query_all(queries, headers):
+    """Run a batch and follow each list query's "next" cursor; returns every query's pages of data."""
+    queries = list(queries)
+    pages = [[] for _ in queries]
+    pending = list(range(len(queries)))
+    response = None
+    while pending:
+        results, response = batch_query([queries[i] for i in pending], headers)
+        if results is None:
+            return None, response
+        still_pending = []
+        for i, result in zip(pending, results):
+            pages[i].append(result["data"])
+            if result.get("next") is not None:
+                queries[i] = {**queries[i], "after": result["next"]}
+                still_pending.append(i)
+        pending = still_pending
+    return pages, response
+
+
+def merge_compact(pages):
+    """Join compact pages: rows are concatenated and the id -> name tables merged."""
+    merged = {key: {} for key in pages[0] if key not in ("fields", "rows")}
+    merged.update(fields=pages[0]["fields"], rows=[])
+    for page in pages:
+        merged["rows"] += page["rows"]
+        for key, table in page.items():
+            if key not in ("fields", "rows"):
+                merged[key].update(table)
+    return merged
+
+
 def view_all_professor_ratings():
     """Fetch and display all professors with their ratings and the modules they handle."""
     token = load_token()
     headers = {"Authorization": f"Token {token}"} if token else {}
 
-    response = requests.get(f"{BASE_URL}/professors/", headers=headers)
-
-    if response.status_code == 200:
-        try:
-            professors = response.json()
-            if not professors:  # Handle empty response
-                print("⚠️ No professors found in the system.")
-                return
-
-            print("\n🎓 Professor Ratings:\n")
-            for prof in professors:
-                prof_id = prof["id"]
-                prof_name = prof["name"]
-                avg_rating = prof["average_rating"]
-
-                # Fetch modules this professor teaches
-                modules_response = requests.get(f"{BASE_URL}/modules/", headers=headers)
-                modules = []
-                if modules_response.status_code == 200:
-                    try:
-                        all_modules = modules_response.json()
-                        for module in all_modules:
-                            if any(teacher["id"] == prof_id for teacher in module["professors"]):
-                                modules.append(f"{module['name']} ({module['code']})")
-                    except requests.exceptions.JSONDecodeError:
-                        print("⚠️ Server error: Failed to parse module list.")
-
-                module_list = ", ".join(modules) if modules else "No modules assigned"
-                print(f"👨‍🏫 {prof_name} (ID: {prof_id})")
-                print(f"   📊 Rating: {avg_rating}")
-                print(f"   📚 Modules: {module_list}\n")
-                print("-" * 50)
+    try:
+        pages, response = batch_query_all([{"type": "professors", "format": "compact"}], headers)
+    except requests.exceptions.JSONDecodeError:
+        print("⚠️ Server returned an empty response or invalid JSON format.")
+        return
 
-        except requests.exceptions.JSONDecodeError:
-            print("⚠️ Server returned an empty response or invalid JSON format.")
-    else:
+    if pages is None:
         print(f"❌ Failed to fetch professor ratings (HTTP {response.status_code})")
+        return
+
+    data = merge_compact(pages[0])
+    professors = compact_rows(data)
+    all_modules = data["modules"]  # JSON object keys are strings
+    if not professors:  # Handle empty response
+        print("⚠️ No professors found in the system.")
+        return
+
+    print("\n🎓 Professor Ratings:\n")
+    for prof in professors:
+        # Module ids are resolved against the table sent once with the response
+        modules = [f"{all_modules[str(mod_id)][1]} ({all_modules[str(mod_id)][0]})" for mod_id in prof["modules"]]
+        module_list = ", ".join(modules) if modules else "No modules assigned"
+        print(f"👨‍🏫 {prof['name']} (ID: {prof['id']})")
+        print(f"   📊 Rating: {render_rating(prof['average'])}")
+        print(f"   📚 Modules: {module_list}\n")
+        print("-" * 50)
+
+
+def view_dashboard():
+    """Modules, professors and every per-module average in one batch request."""
+    token = load_token()
+    headers = {"Authorization": f"Token {token}"} if token else {}
+
+    pages, response = batch_query_all([{"type": "professors", "format": "compact"}, {"type": "module_averages"}], headers)
+    if pages is None:
+        print(f"❌ Failed to load dashboard (HTTP {response.status_code})")
+        return
+
+    professors = compact_rows(merge_compact(pages[0]))
+    averages = [data for page in pages[1] for data in page]
+
+    print("\n📋 Dashboard:\n")
+    for prof in professors:
+        print(f"👨‍🏫 {prof['name']} (ID: {prof['id']}) - {render_rating(prof['average'])}")
+    print("-" * 50)
+    for data in averages:
+        print(f"📚 {data['module_code']} - {data['professor_name']}: {data['average_rating']}")
 
 
 def average_rating():
@@ -217,6 +288,34 @@ def rate_professor():
         print(f"❌ Error: {response.json().get('detail', 'Unknown error')}")
 
 
+def search_catalogue():
+    """Search professors and modules by name or module code prefix."""
+    token = load_token()
+    headers = {"Authorization": f"Token {token}"} if token else {}
+
+    query = input("Search (e.g., CS30, Smith): ").strip()
+    if not query:
+        print("⚠️ Please enter something to search for.")
+        return
+
+    response = requests.get(f"{BASE_URL}/search/", headers=headers, params={"q": query})
+
+    if response.status_code == 200:
+        results = response.json()["results"]
+        if not results:
+            print("⚠️ No matches found.")
+            return
+
+        print("\n🔎 Search Results:")
+        for result in results:
+            if result["type"] == "professor":
+                print(f"👨‍🏫 {result['name']} (ID: {result['id']})")
+            else:
+                print(f"📌 {result['code']} - {result['name']}")
+    else:
+        print(f"❌ Search failed (HTTP {response.status_code})")
+
+
 def auth_menu():
     """Menu for authentication (Register/Login/Exit)."""
     while True:
@@ -236,18 +335,20 @@ def auth_menu():
 
 
 def main_menu():
-    """Main menu after successful login, showing options 1-4."""
+    """Main menu after successful login, showing options 1-6."""
     while True:
         print("\n📌 Main Menu (Choose an option):")
         print("1️⃣  List module instances and professors")
         print("2️⃣  View professor ratings")
         print("3️⃣  View average professor rating in a module")
         print("4️⃣  Rate a professor")
+        print("5️⃣  Dashboard")
+        print("6️⃣  Search professors and modules")
         print("🔴  Logout (type 'logout')")
 
-        command = input("Enter option (1-4) or 'logout': ").strip().lower()
+        command = input("Enter option (1-6) or 'logout': ").strip().lower()
 
-        # Options 1-4 
+        # Options 1-6 
         if command == "1":
             list_modules() 
         elif command == "2":
@@ -256,11 +357,15 @@ def main_menu():
             average_rating()
         elif command == "4":
             rate_professor()
+        elif command == "5":
+            view_dashboard()
+        elif command == "6":
+            search_catalogue()
         elif command == "logout":
             logout()
             return  # Go back to authentication menu
         else:
-            print("❌ Invalid option! Please enter a number (1-4) or 'logout'.")
+            print("❌ Invalid option! Please enter a number (1-6) or 'logout'.")
 
 
 def main():
@@ -0,0 +1,26 @@
+"""Multi-process deployment profile: gunicorn -c gunicorn.conf.py
+
+All workers share one mmap'd aggregate store (ratings/sharedstore.py), so averages
+are computed once and every worker reads the same numbers.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "professor_rating.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+
+# Import Django, warm up and build the shared store once in the master, then fork
+preload_app = True
+
+raw_env = [
+    "DJANGO_SETTINGS_MODULE=professor_rating.settings",
+    f"DJANGO_AGGREGATE_STORE={os.environ.get('DJANGO_AGGREGATE_STORE', '/dev/shm/professor_rating.aggregates')}",
+]
+
+
+def post_fork(server, worker):
+    # Database connections opened during warm-up must not be shared with the children
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,398 @@
+"""Headless load generator for the professor rating API.
+
+Replays the flows of client.py (register -> login -> browse/rate -> logout)
+with many concurrent virtual users, or replays a captured JSONL request log.
+
+    python loadgen.py --users 20 --duration 60 --think 0.2:1.0
+    python loadgen.py --users 5 --sessions 2 --record session.jsonl
+    python loadgen.py --replay session.jsonl --speed 2
+"""
+import argparse
+import bisect
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+import requests
+
+from client import BASE_URL
+
+DEFAULT_MIX = "modules=3,professors=3,average=2,rate=1,search=2,dashboard=1"
+SEARCH_TERMS = ["CS", "CS30", "Intro", "Al", "Prof", "Sm", "Da", "Ma"]
+
+# A virtual user whose register/login fails waits LOGIN_BACKOFF * 2**(failures - 1)
+# seconds, capped at MAX_LOGIN_BACKOFF, before starting its next session
+LOGIN_BACKOFF = 0.5
+MAX_LOGIN_BACKOFF = 10.0
+
+# Upper bounds (ms) of the latency histogram buckets; the last one catches everything slower
+HISTOGRAM_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf")]
+
+ROUTE_LABELS = [
+    (re.compile(r"^/ratings/\d+/[^/]+/$"), "GET /ratings/{professor_id}/{module_code}/"),
+]
+
+
+def endpoint_label(method, path):
+    """Group concrete paths under their route, e.g. /ratings/3/CS3021/ -> /ratings/{professor_id}/{module_code}/."""
+    path = path.split("?", 1)[0]
+    for pattern, label in ROUTE_LABELS:
+        if pattern.match(path):
+            return label
+    return f"{method} {path}"
+
+
+class Stats:
+    """Thread-safe latency, status and error counters per endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}  # endpoint -> list of ms
+        self.statuses = {}  # endpoint -> {status: count}
+        self.errors = {}  # endpoint -> transport errors and 5xx
+        self.started = time.perf_counter()
+
+    def record(self, endpoint, status, latency_ms):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency_ms)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            if status is None or status >= 500:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        all_latencies = [ms for values in self.latencies.values() for ms in values]
+        total = len(all_latencies)
+        errors = sum(self.errors.values())
+
+        print(f"\n📈 {total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s), "
+              f"errors: {errors} ({100 * errors / total if total else 0:.2f}%)\n")
+
+        header = f"{'endpoint':<48} {'count':>6} {'req/s':>7} {'err%':>6} {'4xx':>5} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}"
+        print(header)
+        print("-" * len(header))
+        for endpoint in sorted(self.latencies):
+            values = sorted(self.latencies[endpoint])
+            count = len(values)
+            client_errors = sum(n for status, n in self.statuses[endpoint].items() if status and 400 <= status < 500)
+            print(f"{endpoint:<48} {count:>6} {count / elapsed:>7.1f} "
+                  f"{100 * self.errors.get(endpoint, 0) / count:>6.1f} {client_errors:>5} "
+                  f"{percentile(values, 50):>7.1f} {percentile(values, 90):>7.1f} "
+                  f"{percentile(values, 99):>7.1f} {values[-1]:>7.1f}")
+
+        print("\n⏱️  Latency histogram (ms, all endpoints):")
+        for bound, count in histogram(all_latencies):
+            label = f"<= {bound:g}" if bound != float("inf") else f"> {HISTOGRAM_BUCKETS[-2]:g}"
+            bar = "█" * round(50 * count / total) if total else ""
+            print(f"{label:>9} {count:>7} {bar}")
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            endpoint: {
+                "count": len(values),
+                "req_per_s": len(values) / elapsed,
+                "errors": self.errors.get(endpoint, 0),
+                "statuses": {str(status): n for status, n in self.statuses[endpoint].items()},
+                "p50_ms": percentile(sorted(values), 50),
+                "p90_ms": percentile(sorted(values), 90),
+                "p99_ms": percentile(sorted(values), 99),
+                "histogram": [[bound if bound != float("inf") else None, n] for bound, n in histogram(values)],
+            }
+            for endpoint, values in self.latencies.items()
+        }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def histogram(latencies):
+    counts = [0] * len(HISTOGRAM_BUCKETS)
+    for ms in latencies:
+        counts[bisect.bisect_left(HISTOGRAM_BUCKETS, ms)] += 1
+    return list(zip(HISTOGRAM_BUCKETS, counts))
+
+
+class Recorder:
+    """Appends every request as one JSON line so a run can be replayed later."""
+
+    def __init__(self, path):
+        self.file = open(path, "w") if path else None
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def write(self, user, method, path, params, body, status, sent_at, latency_ms):
+        if not self.file:
+            return
+        line = json.dumps({
+            "t": round(sent_at - self.started, 4),  # offset of the request start
+            "user": user,
+            "method": method,
+            "path": path,
+            "params": params,
+            "json": body,
+            "status": status,
+            "latency_ms": round(latency_ms, 2),
+        })
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+class VirtualUser:
+    """One simulated client: its own HTTP session, token and view of the catalogue."""
+
+    def __init__(self, base_url, stats, recorder, username=None, timeout=10):
+        self.base_url = base_url
+        self.stats = stats
+        self.recorder = recorder
+        self.username = username or f"load_{uuid.uuid4().hex[:12]}"
+        self.password = "load-" + uuid.uuid4().hex
+        self.http = requests.Session()
+        self.token = None
+        self.modules = []
+        self.timeout = timeout
+
+    def call(self, method, path, params=None, body=None, endpoint=None):
+        headers = {"Authorization": f"Token {self.token}"} if self.token else {}
+        endpoint = endpoint or endpoint_label(method, path)
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, params=params, json=body,
+                                         headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            response = None
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        status = response.status_code if response is not None else None
+        self.stats.record(endpoint, status, latency_ms)
+        self.recorder.write(self.username, method, path, params, body, status, start, latency_ms)
+        return response
+
+    def json(self, response):
+        try:
+            return response.json() if response is not None and response.ok else None
+        except ValueError:
+            return None
+
+    # Flows mirroring client.py
+
+    def register(self):
+        self.call("POST", "/register/", body={
+            "username": self.username, "email": f"{self.username}@example.com", "password": self.password,
+        })
+
+    def login(self):
+        data = self.json(self.call("POST", "/login/", body={"username": self.username, "password": self.password}))
+        self.token = data.get("token") if data else None
+        return self.token is not None
+
+    def logout(self):
+        self.call("POST", "/logout/")
+        self.token = None
+
+    def list_modules(self, rng):
+        data = self.json(self.call("GET", "/modules/"))
+        if data is not None:
+            self.modules = data
+
+    def view_professors(self, rng):
+        self.call("GET", "/professors/", params={"format": "compact"} if rng.random() < 0.5 else None)
+
+    def average_rating(self, rng):
+        module, professor = self._pick(rng)
+        if module:
+            self.call("GET", f"/ratings/{professor['id']}/{module['code']}/",
+                      params={"year": module["year"], "semester": module["semester"]})
+
+    def rate(self, rng):
+        module, professor = self._pick(rng)
+        if module:
+            self.call("POST", "/rate/", body={
+                "professor": professor["id"], "module": module["code"], "year": module["year"],
+                "semester": module["semester"], "rating": rng.randint(1, 5),
+            })
+
+    def search(self, rng):
+        self.call("GET", "/search/", params={"q": rng.choice(SEARCH_TERMS)})
+
+    def dashboard(self, rng):
+        # Like client.py, keep requesting the list queries' next pages until none is left
+        queries = [{"type": "professors", "format": "compact"}, {"type": "module_averages"}]
+        while queries:
+            data = self.json(self.call("POST", "/batch/", body={"queries": queries}))
+            if data is None:
+                return
+            queries = [
+                {**query, "after": result["next"]}
+                for query, result in zip(queries, data["results"])
+                if result.get("next") is not None
+            ]
+
+    def _pick(self, rng):
+        if not self.modules:
+            self.list_modules(rng)
+        taught = [module for module in self.modules if module["professors"]]
+        if not taught:
+            return None, None
+        module = rng.choice(taught)
+        return module, rng.choice(module["professors"])
+
+
+ACTIONS = {
+    "modules": VirtualUser.list_modules,
+    "professors": VirtualUser.view_professors,
+    "average": VirtualUser.average_rating,
+    "rate": VirtualUser.rate,
+    "search": VirtualUser.search,
+    "dashboard": VirtualUser.dashboard,
+}
+
+
+def parse_mix(text):
+    """'modules=3,rate=1' -> ([names], [weights])"""
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ACTIONS:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r}; choose from {', '.join(ACTIONS)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def parse_think(text):
+    low, _, high = text.partition(":")
+    return float(low), float(high or low)
+
+
+def run_user(args, stats, recorder, deadline, seed):
+    rng = random.Random(seed)
+    names, weights = args.mix
+    sessions = failures = 0
+
+    while time.monotonic() < deadline and (args.sessions is None or sessions < args.sessions):
+        user = VirtualUser(args.base_url, stats, recorder, timeout=args.timeout)
+        user.register()
+        if user.login():
+            failures = 0
+            for _ in range(args.actions):
+                if time.monotonic() >= deadline:
+                    break
+                ACTIONS[rng.choices(names, weights)[0]](user, rng)
+                time.sleep(rng.uniform(*args.think))
+            user.logout()
+        else:
+            # The server is down or refusing sign-ups: back off instead of spinning
+            failures += 1
+            delay = min(MAX_LOGIN_BACKOFF, LOGIN_BACKOFF * 2 ** (failures - 1))
+            time.sleep(max(0.0, min(delay, deadline - time.monotonic())))
+        sessions += 1
+
+
+def run_load(args):
+    stats = Stats()
+    recorder = Recorder(args.record)
+    deadline = time.monotonic() + args.duration
+    threads = []
+
+    print(f"🚀 {args.users} virtual users against {args.base_url} for up to {args.duration:g}s")
+    for index in range(args.users):
+        thread = threading.Thread(target=run_user, args=(args, stats, recorder, deadline, args.seed + index), daemon=True)
+        threads.append(thread)
+        thread.start()
+        if args.ramp_up:
+            time.sleep(args.ramp_up / args.users)
+
+    for thread in threads:
+        thread.join()
+    recorder.close()
+    return stats
+
+
+def replay_user(args, stats, username, records, started):
+    """Replay one recorded user's requests in order, keeping the original spacing (scaled by --speed)."""
+    user = VirtualUser(args.base_url, stats, Recorder(None), username=f"{username}_{args.run_id}", timeout=args.timeout)
+
+    for record in records:
+        delay = started + record["t"] / args.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        body = record.get("json")
+        if isinstance(body, dict) and "username" in body:
+            # Recorded accounts already exist on the server; replay under fresh names
+            body = dict(body, username=user.username)
+        response = user.call(record["method"], record["path"], params=record.get("params"), body=body)
+
+        if record["path"] == "/login/":
+            data = user.json(response)
+            user.token = data.get("token") if data else None
+        elif record["path"] == "/logout/":
+            user.token = None
+
+
+def run_replay(args):
+    by_user = {}
+    with open(args.replay) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                by_user.setdefault(record.get("user", "anonymous"), []).append(record)
+
+    stats = Stats()
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=replay_user, args=(args, stats, username, sorted(records, key=lambda r: r["t"]), started), daemon=True)
+        for username, records in by_user.items()
+    ]
+    print(f"🔁 Replaying {sum(map(len, by_user.values()))} requests from {len(by_user)} users at {args.speed:g}x")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL, help="API root (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="stop after this many seconds")
+    parser.add_argument("--sessions", type=int, help="sessions per virtual user (default: until --duration)")
+    parser.add_argument("--actions", type=int, default=8, help="actions per session between login and logout")
+    parser.add_argument("--think", type=parse_think, default=(0.1, 0.5), help="think time range in seconds, e.g. 0.2:1.5")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"action weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds over which to start the users")
+    parser.add_argument("--timeout", type=float, default=10, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for reproducible action sequences")
+    parser.add_argument("--record", help="write every request to this JSONL file")
+    parser.add_argument("--replay", help="replay a JSONL request log instead of generating sessions")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    parser.add_argument("--report-json", help="also write per-endpoint results to this JSON file")
+    args = parser.parse_args()
+    args.base_url = args.base_url.rstrip("/")
+    args.run_id = uuid.uuid4().hex[:6]
+
+    stats = run_replay(args) if args.replay else run_load(args)
+    stats.report()
+
+    if args.report_json:
+        with open(args.report_json, "w") as file:
+            json.dump(stats.as_dict(), file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,6 +31,9 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# API-only workers can skip loading the admin (DJANGO_ENABLE_ADMIN=0)
+ENABLE_ADMIN = os.environ.get('DJANGO_ENABLE_ADMIN', '1') == '1'
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -42,8 +46,12 @@ INSTALLED_APPS = [
     'ratings',
 ]
 
+if not ENABLE_ADMIN:
+    INSTALLED_APPS.remove('django.contrib.admin')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'ratings.middleware.CompressionMiddleware',  # gzip, or brotli when installed
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,6 +80,18 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'professor_rating.wsgi.application'
 
+# Prime URL resolvers, DRF settings and the database before a worker serves traffic
+RATINGS_WARMUP = os.environ.get('DJANGO_WARMUP', '1') == '1'
+
+# Shared-memory (count, total) aggregates read by every worker process, see
+# ratings/sharedstore.py. Off unless DJANGO_AGGREGATE_STORE names the mmap file,
+# e.g. /dev/shm/professor_rating.aggregates
+RATINGS_AGGREGATE_STORE = {
+    'PATH': os.environ.get('DJANGO_AGGREGATE_STORE'),
+    'PROFESSOR_SLOTS': 65536,  # professor ids must stay below this
+    'PAIR_SLOTS': 262144,  # (professor, module) pairs; keep under ~70% full
+}
+
 # authentication settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -80,6 +100,11 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'ratings.renderers.CompactJSONRenderer',  # ?format=compact
+    ],
 }
 
 # Database
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'professor_rating.settings')
 
 application = get_wsgi_application()
+
+# Pay first-request costs (URL resolver, DRF setup, cold DB pages) before serving
+from ratings.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -1,6 +1,76 @@
 from django.contrib import admin
-from .models import Professor, Module, Rating
+from .models import Professor, Module, Rating, ArchivedAggregate
+from .paginators import EstimatedCountPaginator
 
-admin.site.register(Professor)
-admin.site.register(Module)
-admin.site.register(Rating)
\ No newline at end of file
+
+class ModuleYearFilter(admin.SimpleListFilter):
+    """Filter ratings by module year, taking the choices from the small Module table
+    instead of a DISTINCT over every rating."""
+    title = 'module year'
+    parameter_name = 'module_year'
+
+    def lookups(self, request, model_admin):
+        years = Module.objects.values_list('year', flat=True).distinct().order_by('-year')
+        return [(year, year) for year in years]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(module__year=self.value())
+        return queryset
+
+
+class ModuleSemesterFilter(ModuleYearFilter):
+    title = 'module semester'
+    parameter_name = 'module_semester'
+
+    def lookups(self, request, model_admin):
+        semesters = Module.objects.values_list('semester', flat=True).distinct().order_by('semester')
+        return [(semester, semester) for semester in semesters]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(module__semester=self.value())
+        return queryset
+
+
+@admin.register(Professor)
+class ProfessorAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
+
+
+@admin.register(Module)
+class ModuleAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'year', 'semester')
+    list_filter = ('year', 'semester')  # backed by the (year, semester) index
+    search_fields = ('code', 'name')
+    autocomplete_fields = ('professors',)  # ProfessorAdmin.search_fields; no widget listing every professor
+
+
+@admin.register(Rating)
+class RatingAdmin(admin.ModelAdmin):
+    list_display = ('professor', 'module', 'user', 'rating')
+    list_select_related = ('professor', 'module', 'user')  # Rating.__str__ and the columns need all three
+    list_filter = (ModuleYearFilter, ModuleSemesterFilter)
+    raw_id_fields = ('professor', 'module', 'user')  # no <select> of every user on the change form
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+
+
+@admin.register(ArchivedAggregate)
+class ArchivedAggregateAdmin(admin.ModelAdmin):
+    list_display = ('professor', 'module', 'year', 'semester', 'count', 'total')
+    list_select_related = ('professor', 'module')
+    list_filter = ('year', 'semester')
+    raw_id_fields = ('professor', 'module')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Frozen totals only come from archive_ratings; the shared aggregate store follows
+    # deletes but not hand edits, so the rows are view and delete only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
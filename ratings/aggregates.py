@@ -0,0 +1,108 @@
+import threading
+
+from django.db import connections
+from django.db.models import Count, Sum
+
+from .models import ArchivedAggregate, Rating
+from .sharedstore import StoreUnavailable, get_store
+
+
+def _merge(totals, rows, key_fields):
+    for row in rows:
+        key = tuple(row[field] for field in key_fields) if len(key_fields) > 1 else row[key_fields[0]]
+        count, total = totals.get(key, (0, 0))
+        totals[key] = (count + row["count"], total + row["total"])
+    return totals
+
+
+def professor_totals(professor_ids=None):
+    """professor_id -> (count, total) over live ratings and frozen archived aggregates.
+
+    With professor_ids, only those professors (a page of a list) are looked up.
+    """
+    store = get_store()
+    if store is not None:
+        try:
+            totals = store.professor_totals()
+        except StoreUnavailable:
+            pass
+        else:
+            if professor_ids is None:
+                return totals
+            return {professor_id: totals[professor_id] for professor_id in professor_ids if professor_id in totals}
+    return professor_totals_db(professor_ids)
+
+
+def pair_totals(pairs):
+    """(professor_id, module_id) -> (count, total) for exactly the requested pairs."""
+    pairs = set(pairs)
+    store = get_store()
+    if store is not None:
+        try:
+            return store.pair_totals(pairs)
+        except StoreUnavailable:
+            pass
+    return pair_totals_db(pairs)
+
+
+def professor_totals_db(professor_ids=None):
+    live = Rating.objects.all()
+    frozen = ArchivedAggregate.objects.all()
+    if professor_ids is not None:
+        live = live.filter(professor_id__in=professor_ids)
+        frozen = frozen.filter(professor_id__in=professor_ids)
+    live = live.values("professor_id").annotate(count=Count("id"), total=Sum("rating")).order_by()
+    frozen = frozen.values("professor_id").annotate(count=Sum("count"), total=Sum("total")).order_by()
+    return _merge(_merge({}, live, ["professor_id"]), frozen, ["professor_id"])
+
+
+def pair_totals_db(pairs=None):
+    """Grouped from the database; without pairs, every (professor, module) pair."""
+    fields = ["professor_id", "module_id"]
+    live = Rating.objects.all()
+    frozen = ArchivedAggregate.objects.all()
+    if pairs is not None:
+        professor_ids = {professor_id for professor_id, _ in pairs}
+        module_ids = {module_id for _, module_id in pairs}
+        live = live.filter(professor_id__in=professor_ids, module_id__in=module_ids)
+        frozen = frozen.filter(professor_id__in=professor_ids, module_id__in=module_ids)
+    live = live.values(*fields).annotate(count=Count("id"), total=Sum("rating")).order_by()
+    totals = _merge(_merge({}, live, fields), frozen.values(*fields, "count", "total"), fields)
+    if pairs is not None:
+        # The IN filters match the cross product of the ids; keep the requested pairs only
+        totals = {pair: pair_total for pair, pair_total in totals.items() if pair in pairs}
+    return totals
+
+
+def rebuild_store(force=True):
+    """Load the shared store from the database. Returns False when it is disabled or too small."""
+    store = get_store()
+    if store is None:
+        return False
+    return store.rebuild(lambda: (professor_totals_db(), pair_totals_db()), force=force)
+
+
+_rebuild_pending = threading.Lock()
+
+
+def schedule_rebuild():
+    """Rebuild the store in a background thread, so the request that found it stale does not wait.
+
+    At most one rebuild per process is pending; reads use the database until it is done.
+    """
+    if not _rebuild_pending.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            rebuild_store(force=False)  # another process may have rebuilt it already
+        finally:
+            connections.close_all()  # this thread's own connections
+            _rebuild_pending.release()
+
+    threading.Thread(target=run, name="aggregate-store-rebuild", daemon=True).start()
+
+
+def average(totals):
+    count, total = totals
+    return total / count if count else None
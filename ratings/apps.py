@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class RatingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ratings'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - registers the search index and aggregate store receivers
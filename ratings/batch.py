@@ -0,0 +1,85 @@
+from .aggregates import average, pair_totals
+from .models import Professor, Module
+
+
+class AverageRatingLoader:
+    """Collects (professor, module, year, semester) lookups and resolves them together.
+
+    Every requested average is answered from the same four queries (professors,
+    modules, grouped live ratings, archived aggregates) no matter how many keys
+    were loaded.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.results = {}
+
+    def load(self, professor_id, module_code, year=None, semester=None):
+        """Queue one lookup and return its key in resolve()'s results.
+
+        Raises TypeError for a year or semester that is not a plain number or string
+        (e.g. a JSON list from a batch query), which could not be part of the key.
+        """
+        for value in (year, semester):
+            if value is not None and not isinstance(value, (str, int)):
+                raise TypeError("Year and semester must be numbers or strings.")
+        key = (int(professor_id), str(module_code), year, semester)
+        self.keys.append(key)
+        return key
+
+    def resolve(self):
+        if not self.keys:
+            return self.results
+
+        professor_ids = {key[0] for key in self.keys}
+        module_codes = {key[1] for key in self.keys}
+
+        professors = Professor.objects.in_bulk(professor_ids)
+        modules = {m.code: m for m in Module.objects.filter(code__in=module_codes)}
+
+        # One grouped query (or one store probe each) for exactly the requested (professor, module) pairs
+        pairs = {(key[0], modules[key[1]].id) for key in self.keys if key[1] in modules}
+        totals = pair_totals(pairs)
+        averages = {pair: average(pair_total) for pair, pair_total in totals.items()}
+
+        for key in self.keys:
+            self.results[key] = self._build(key, professors, modules, averages)
+        return self.results
+
+    def _build(self, key, professors, modules, averages):
+        professor_id, module_code, year, semester = key
+
+        professor = professors.get(professor_id)
+        if professor is None:
+            return 404, {"detail": "❌ Professor not found."}
+
+        module = modules.get(module_code)
+        if module is None:
+            return 404, {"detail": "❌ Module not found."}
+
+        avg_rating = averages.get((professor.id, module.id))
+
+        # Apply filtering for year and semester
+        if year and str(module.year) != str(year):
+            avg_rating = None
+        if semester and str(module.semester) != str(semester):
+            avg_rating = None
+
+        if avg_rating is None:
+            return 200, {
+                "professor_name": professor.name,
+                "professor_id": professor.id,
+                "module_name": module.name,
+                "module_code": module.code,
+                "average_rating": "No ratings yet"
+            }
+
+        return 200, {
+            "professor_name": professor.name,
+            "professor_id": professor.id,
+            "module_name": module.name,
+            "module_code": module.code,
+            "year": year,
+            "semester": semester,
+            "average_rating": round(avg_rating)  # Send numeric value
+        }
@@ -0,0 +1,112 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from ratings.models import ArchiveCutoff, ArchivedAggregate, Module, Rating
+
+
+def archive_table(year):
+    return f"ratings_rating_archive_{int(year)}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze the aggregates of ratings for module instances before YEAR, move the rows "
+        "into per-year archive tables and delete them from the live ratings table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", type=int, required=True, help="Archive module years strictly before this one.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be archived without changing anything.")
+
+    def handle(self, *args, **options):
+        before = options["before"]
+        closed = Rating.objects.filter(module__year__lt=before)
+
+        per_year = dict(closed.values_list("module__year").annotate(n=Count("id")).order_by())
+        if not per_year:
+            self.stdout.write(f"No ratings before {before} to archive.")
+            if not options["dry_run"]:
+                # The years are still closed, even with nothing to move
+                ArchiveCutoff.objects.create(before=before)
+            return
+
+        for year, count in sorted(per_year.items()):
+            self.stdout.write(f"{year}: {count} ratings -> {archive_table(year)}")
+
+        if options["dry_run"]:
+            return
+
+        try:
+            with transaction.atomic():
+                self._freeze_aggregates(closed, before)
+                for year in per_year:
+                    self._copy_rows(year)
+                deleted = self._delete_rows(before)
+                ArchiveCutoff.objects.create(before=before)
+        except Exception as exc:
+            raise CommandError(f"Archiving failed, nothing was changed: {exc}") from exc
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {deleted} ratings from {len(per_year)} year(s)."))
+
+    def _freeze_aggregates(self, closed, before):
+        grouped = (
+            closed.values("professor_id", "module_id", "module__year", "module__semester")
+            .annotate(count=Count("id"), total=Sum("rating"))
+            .order_by()
+        )
+        existing = {
+            (agg.professor_id, agg.module_id): agg
+            for agg in ArchivedAggregate.objects.filter(year__lt=before)
+        }
+        to_create, to_update = [], []
+
+        for row in grouped:
+            agg = existing.get((row["professor_id"], row["module_id"]))
+            if agg is None:
+                to_create.append(ArchivedAggregate(
+                    professor_id=row["professor_id"],
+                    module_id=row["module_id"],
+                    year=row["module__year"],
+                    semester=row["module__semester"],
+                    count=row["count"],
+                    total=row["total"],
+                ))
+            else:
+                # Archiving again after late ratings: fold them into the frozen totals
+                agg.count += row["count"]
+                agg.total += row["total"]
+                to_update.append(agg)
+
+        ArchivedAggregate.objects.bulk_create(to_create, batch_size=500)
+        ArchivedAggregate.objects.bulk_update(to_update, ["count", "total"], batch_size=500)
+
+    def _delete_rows(self, before):
+        # Raw DELETE: the rows now live on in the frozen aggregates, so the per-row
+        # post_delete receivers (which subtract from the shared store) must not run
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Rating._meta.db_table} WHERE module_id IN "
+                f"(SELECT id FROM {Module._meta.db_table} WHERE year < %s)",
+                [before],
+            )
+            return cursor.rowcount
+
+    def _copy_rows(self, year):
+        table = connection.ops.quote_name(archive_table(year))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id bigint NOT NULL PRIMARY KEY, "
+                "professor_id integer NOT NULL, "
+                "module_id bigint NOT NULL, "
+                "user_id integer NOT NULL, "
+                "rating integer NOT NULL)"
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (id, professor_id, module_id, user_id, rating) "
+                f"SELECT r.id, r.professor_id, r.module_id, r.user_id, r.rating "
+                f"FROM {Rating._meta.db_table} r JOIN {Module._meta.db_table} m ON r.module_id = m.id "
+                f"WHERE m.year = %s",
+                [year],
+            )
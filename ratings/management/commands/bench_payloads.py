@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.text import compress_string
+from rest_framework.renderers import JSONRenderer
+
+from ratings.middleware import BROTLI_QUALITY, brotli
+from ratings.views import module_list_data, module_list_compact, professor_list_data, professor_list_compact
+
+PAYLOADS = [
+    ("/api/modules/", "full", module_list_data),
+    ("/api/modules/", "compact", module_list_compact),
+    ("/api/professors/", "full", professor_list_data),
+    ("/api/professors/", "compact", professor_list_compact),
+]
+
+
+class Command(BaseCommand):
+    help = "Measure serialization time and bytes on the wire for the list endpoints, full vs compact."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per payload; the best time is reported.")
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        header = f"{'endpoint':<18} {'format':<8} {'build ms':>9} {'render ms':>10} {'raw B':>10} {'gzip B':>10} {'br B':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        for endpoint, fmt, build in PAYLOADS:
+            build_times, render_times = [], []
+            for _ in range(max(options["repeat"], 1)):
+                start = time.perf_counter()
+                data = build()
+                built = time.perf_counter()
+                body = renderer.render(data)
+                build_times.append(built - start)
+                render_times.append(time.perf_counter() - built)
+
+            gzip_size = len(compress_string(body))
+            br_size = len(brotli.compress(body, quality=BROTLI_QUALITY)) if brotli else "n/a"
+            self.stdout.write(
+                f"{endpoint:<18} {fmt:<8} {min(build_times) * 1000:>9.1f} {min(render_times) * 1000:>10.1f} "
+                f"{len(body):>10} {gzip_size:>10} {br_size:>10}"
+            )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ratings.aggregates import pair_totals_db, professor_totals_db, rebuild_store
+from ratings.sharedstore import StoreUnavailable, get_store
+
+
+class Command(BaseCommand):
+    help = "Compare the shared-memory aggregate store with the database, optionally rebuilding it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Rebuild the store from the database when it differs.")
+        parser.add_argument("--show", type=int, default=20, help="Number of mismatches to print.")
+
+    def handle(self, *args, **options):
+        store = get_store()
+        if store is None:
+            self.stdout.write(self.style.WARNING("Aggregate store is disabled (DJANGO_AGGREGATE_STORE is not set)."))
+            return
+
+        mismatches = self._compare(store)
+        if mismatches is None:
+            self.stdout.write(self.style.WARNING("Aggregate store is not built; reads are served from the database."))
+        elif not mismatches:
+            self.stdout.write(self.style.SUCCESS("Aggregate store matches the database."))
+            return
+        else:
+            self.stdout.write(self.style.ERROR(f"{len(mismatches)} aggregate(s) differ from the database:"))
+            for key, stored, expected in mismatches[:options["show"]]:
+                self.stdout.write(f"  {key}: store {stored} != database {expected}")
+
+        if not options["repair"]:
+            raise CommandError("Run with --repair to rebuild the store from the database.")
+
+        if not rebuild_store():
+            raise CommandError("Rebuild failed: the store is too small for this catalogue (see the logs).")
+        self.stdout.write(self.style.SUCCESS("Aggregate store rebuilt from the database."))
+
+    def _compare(self, store):
+        try:
+            stored_professors = store.professor_totals()
+            stored_pairs = store.pair_totals()  # every stored pair, so stray ones are reported too
+        except StoreUnavailable:
+            return None
+
+        mismatches = []
+        for label, stored, expected in (
+            ("professor", stored_professors, professor_totals_db()),
+            ("pair", stored_pairs, pair_totals_db()),
+        ):
+            for key in sorted(set(stored) | set(expected)):
+                if stored.get(key, (0, 0)) != expected.get(key, (0, 0)):
+                    mismatches.append((f"{label} {key}", stored.get(key, (0, 0)), expected.get(key, (0, 0))))
+        return mismatches
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from ratings.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over professor names and module names/codes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to rebuild the index on.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not fts_enabled(connection):
+            self.stdout.write(self.style.WARNING("Search index is SQLite only; nothing to rebuild."))
+            return
+
+        count = rebuild_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} professors and modules."))
@@ -0,0 +1,63 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+# Imported in a fresh interpreter exactly the way a gunicorn worker loads the app
+PROFILE_SCRIPT = """
+import time
+start = time.perf_counter()
+import {module}
+print("LOADED", time.perf_counter() - start)
+"""
+
+
+class Command(BaseCommand):
+    help = "Profile worker startup: import times (python -X importtime) of the WSGI application, including warm-up."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=25, help="Number of slowest imports to show.")
+        parser.add_argument("--no-warmup", action="store_true", help="Profile with the warm-up stage disabled.")
+        parser.add_argument("--no-admin", action="store_true", help="Profile an API-only worker without the admin.")
+
+    def handle(self, *args, **options):
+        module = settings.WSGI_APPLICATION.rsplit(".", 1)[0]
+
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "professor_rating.settings"))
+        if options["no_warmup"]:
+            env["DJANGO_WARMUP"] = "0"
+        if options["no_admin"]:
+            env["DJANGO_ENABLE_ADMIN"] = "0"
+
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROFILE_SCRIPT.format(module=module)],
+            env=env, capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise CommandError(f"Loading {module} failed:\n{proc.stderr[-2000:]}")
+
+        imports = []
+        for line in proc.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                imports.append((int(cumulative_us), int(self_us), len(indent) // 2, name))
+
+        loaded = next(float(line.split()[1]) for line in proc.stdout.splitlines() if line.startswith("LOADED"))
+        top_level_us = sum(cumulative for cumulative, _, depth, _ in imports if depth == 0)
+
+        self.stdout.write(f"Interpreter + load wall time: {wall * 1000:.0f} ms")
+        self.stdout.write(f"Loading {module} (setup, imports, warm-up): {loaded * 1000:.0f} ms")
+        self.stdout.write(f"Modules imported: {len(imports)}, total import time: {top_level_us / 1000:.0f} ms\n")
+
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        for cumulative, self_us, depth, name in sorted(imports, reverse=True)[:options["top"]]:
+            self.stdout.write(f"{cumulative / 1000:>14.1f} {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+CREATE_SEARCH_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS ratings_search USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    name,
+    code,
+    tokenize = 'unicode61',
+    prefix = '1 2 3'
+)
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other backends use the LIKE fallback in ratings.search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(CREATE_SEARCH_TABLE)
+    schema_editor.execute(
+        "INSERT INTO ratings_search (kind, object_id, name, code) "
+        "SELECT 'professor', id, name, '' FROM ratings_professor"
+    )
+    schema_editor.execute(
+        "INSERT INTO ratings_search (kind, object_id, name, code) "
+        "SELECT 'module', id, name, code FROM ratings_module"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS ratings_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0002_alter_rating_professor'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 22:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0003_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('semester', models.IntegerField()),
+                ('count', models.IntegerField()),
+                ('total', models.IntegerField()),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_aggregates', to='ratings.module')),
+                ('professor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_aggregates', to='ratings.professor')),
+            ],
+            options={
+                'unique_together': {('professor', 'module')},
+            },
+        ),
+    ]
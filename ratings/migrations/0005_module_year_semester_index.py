@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0004_archivedaggregate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='module',
+            index=models.Index(fields=['year', 'semester'], name='ratings_mod_year_86fec3_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+# Rows keyed by rowid (professor id * 2, module id * 2 + 1) so that index updates
+# from the save/delete signals are rowid lookups rather than full scans
+def key_search_index_by_rowid(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DELETE FROM ratings_search")
+    schema_editor.execute(
+        "INSERT INTO ratings_search (rowid, kind, object_id, name, code) "
+        "SELECT id * 2, 'professor', id, name, '' FROM ratings_professor"
+    )
+    schema_editor.execute(
+        "INSERT INTO ratings_search (rowid, kind, object_id, name, code) "
+        "SELECT id * 2 + 1, 'module', id, name, code FROM ratings_module"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0005_module_year_semester_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_index_by_rowid, migrations.RunPython.noop),
+    ]
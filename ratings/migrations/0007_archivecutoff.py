@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-18 23:35
+
+from django.db import migrations, models
+
+
+def record_existing_cutoff(apps, schema_editor):
+    # Databases archived before cutoffs were recorded: close every year that has
+    # frozen aggregates
+    ArchivedAggregate = apps.get_model("ratings", "ArchivedAggregate")
+    ArchiveCutoff = apps.get_model("ratings", "ArchiveCutoff")
+    latest = ArchivedAggregate.objects.aggregate(year=models.Max("year"))["year"]
+    if latest is not None:
+        ArchiveCutoff.objects.create(before=latest + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0006_search_index_rowids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveCutoff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('before', models.IntegerField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(record_existing_cutoff, migrations.RunPython.noop),
+    ]
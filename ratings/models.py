@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .sharedstore import write_section
+
 class Professor(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255, unique=True)
@@ -15,6 +17,9 @@ class Module(models.Model):
     semester = models.IntegerField()
     professors = models.ManyToManyField(Professor, related_name="modules")
 
+    class Meta:
+        indexes = [models.Index(fields=['year', 'semester'])]  # year/semester filters and archiving
+
     def __str__(self):
         return f"{self.name} ({self.code})"
 
@@ -28,4 +33,42 @@ class Rating(models.Model):
         unique_together = ('professor', 'module', 'user')  # Prevent duplicate ratings
 
     def __str__(self):
-        return f"{self.professor.name} - {self.module.name}: {self.rating}"
\ No newline at end of file
+        return f"{self.professor.name} - {self.module.name}: {self.rating}"
+
+    # Commit and update the shared aggregate store as one step (see ratings.sharedstore)
+    def save(self, *args, **kwargs):
+        with write_section(kwargs.get("using") or "default"):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with write_section(kwargs.get("using") or "default"):
+            return super().delete(*args, **kwargs)
+
+class ArchivedAggregate(models.Model):
+    """Frozen (count, total) of a professor's ratings in an archived module instance."""
+    professor = models.ForeignKey(Professor, on_delete=models.CASCADE, related_name="archived_aggregates")
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name="archived_aggregates")
+    year = models.IntegerField()
+    semester = models.IntegerField()
+    count = models.IntegerField()
+    total = models.IntegerField()  # sum of the archived ratings
+
+    class Meta:
+        unique_together = ('professor', 'module')
+
+    def __str__(self):
+        return f"{self.professor_id} - {self.module_id} ({self.year}): {self.count} ratings"
+
+
+class ArchiveCutoff(models.Model):
+    """One run of archive_ratings: module years before `before` are closed to new ratings."""
+    before = models.IntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def closed_before(cls):
+        """The latest cutoff year, or None if nothing was ever archived."""
+        return cls.objects.aggregate(before=models.Max("before"))["before"]
+
+    def __str__(self):
+        return f"before {self.before} ({self.archived_at:%Y-%m-%d})"
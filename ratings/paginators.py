@@ -0,0 +1,43 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep
+EXACT_COUNT_THRESHOLD = 100_000
+
+
+def estimated_row_count(model, using="default"):
+    """A cheap row-count estimate for the model's table, or None if the backend has none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    pk = model._meta.pk.column
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == "mysql":
+            cursor.execute("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s", [table])
+        elif connection.vendor == "sqlite" and model._meta.pk.get_internal_type() in ("AutoField", "BigAutoField"):
+            # min/max of an integer primary key are index lookups, unlike COUNT(*)
+            quoted_pk, quoted_table = connection.ops.quote_name(pk), connection.ops.quote_name(table)
+            cursor.execute(f"SELECT max({quoted_pk}) - min({quoted_pk}) + 1 FROM {quoted_table}")
+        else:
+            return None
+        row = cursor.fetchone()
+
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips COUNT(*) over large unfiltered tables and uses an estimate instead."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, "query", None) is None or queryset.query.where:
+            return super().count  # filtered or not a queryset: estimates would be wrong
+
+        estimate = estimated_row_count(queryset.model, queryset.db)
+        if estimate is None or estimate < EXACT_COUNT_THRESHOLD:
+            return super().count
+        return estimate
@@ -0,0 +1,52 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_BATCH = 200  # list items per streamed chunk
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """Selected with ?format=compact.
+
+    List views check for this renderer and send numeric averages, counts and ids
+    instead of rendered star labels; the client does the rendering.
+    """
+    format = "compact"
+
+
+def stream_json_list(items):
+    """Encode an iterable as a JSON array chunk by chunk, the same way JSONRenderer would encode a list."""
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    yield "["
+    first = True
+    for batch in chunked(items):
+        yield ("" if first else ",") + ",".join(encoder.encode(item) for item in batch)
+        first = False
+    yield "]"
+
+
+def stream_compact(fields, rows, table_name, table):
+    """Encode a compact list payload, {"fields": [...], "rows": [...], table_name: {id: ...}}, chunk by chunk.
+
+    `table` yields (id, value) pairs and is only iterated after the last row.
+    """
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    yield '{"fields":' + encoder.encode(fields) + ',"rows":'
+    yield from stream_json_list(rows)
+    yield "," + encoder.encode(table_name) + ":{"
+    first = True
+    for batch in chunked(table):
+        yield ("" if first else ",") + ",".join(encoder.encode(str(key)) + ":" + encoder.encode(value) for key, value in batch)
+        first = False
+    yield "}}"
+
+
+def chunked(items, size=STREAM_BATCH):
+    """Lists of up to `size` consecutive items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
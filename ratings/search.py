@@ -0,0 +1,140 @@
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import Professor, Module
+
+SEARCH_TABLE = "ratings_search"
+
+CREATE_SEARCH_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    kind UNINDEXED,
+    object_id UNINDEXED,
+    name,
+    code,
+    tokenize = 'unicode61',
+    prefix = '1 2 3'
+)
+"""
+
+DROP_SEARCH_TABLE = f"DROP TABLE IF EXISTS {SEARCH_TABLE}"
+
+# bm25 column weights: kind, object_id, name, code (an exact module code beats a name hit)
+RANK = f"bm25({SEARCH_TABLE}, 0, 0, 1.0, 4.0)"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Each row's rowid is derived from its object, so updates and deletes are rowid
+# lookups instead of scans of the UNINDEXED kind/object_id columns
+ROWID_OFFSET = {"professor": 0, "module": 1}
+
+
+def index_rowid(kind, object_id):
+    return int(object_id) * 2 + ROWID_OFFSET[kind]
+
+
+def fts_enabled(connection=None):
+    """The FTS5 index only exists on SQLite; other backends fall back to LIKE queries."""
+    return (connection or connections[DEFAULT_DB_ALIAS]).vendor == "sqlite"
+
+
+def build_match(query):
+    """Turn free text into an FTS5 prefix query: 'cs30 smi' -> '"cs30"* "smi"*'."""
+    tokens = TOKEN_RE.findall(query)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def index_professor(professor, connection=None):
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if not fts_enabled(connection):
+        return
+    rowid = index_rowid("professor", professor.id)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [rowid])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, name, code) VALUES (%s, 'professor', %s, %s, '')",
+            [rowid, professor.id, professor.name],
+        )
+
+
+def index_module(module, connection=None):
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if not fts_enabled(connection):
+        return
+    rowid = index_rowid("module", module.id)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [rowid])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, name, code) VALUES (%s, 'module', %s, %s, %s)",
+            [rowid, module.id, module.name, module.code],
+        )
+
+
+def remove_from_index(kind, object_id, connection=None):
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if not fts_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [index_rowid(kind, object_id)])
+
+
+def rebuild_index(connection=None):
+    """Drop and repopulate the whole index from the Professor and Module tables."""
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if not fts_enabled(connection):
+        return 0
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(DROP_SEARCH_TABLE)
+        cursor.execute(CREATE_SEARCH_TABLE)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, name, code) "
+            f"SELECT id * 2, 'professor', id, name, '' FROM {Professor._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, object_id, name, code) "
+            f"SELECT id * 2 + 1, 'module', id, name, code FROM {Module._meta.db_table}"
+        )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search(query, limit=20):
+    """Ranked professors and modules whose name (or module code) starts with the query words."""
+    match = build_match(query)
+    if not match:
+        return []
+
+    if not fts_enabled():
+        return _search_fallback(query, limit)
+
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            f"SELECT kind, object_id, name, code FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s ORDER BY {RANK} LIMIT %s",
+            [match, limit],
+        )
+        rows = cursor.fetchall()
+
+    results = []
+    for kind, object_id, name, code in rows:
+        if kind == "professor":
+            results.append({"type": "professor", "id": int(object_id), "name": name})
+        else:
+            results.append({"type": "module", "id": int(object_id), "code": code, "name": name})
+    return results
+
+
+def _search_fallback(query, limit):
+    query = query.strip()
+    results = [
+        {"type": "professor", "id": prof.id, "name": prof.name}
+        for prof in Professor.objects.filter(name__icontains=query)[:limit]
+    ]
+    modules = Module.objects.filter(code__istartswith=query) | Module.objects.filter(name__icontains=query)
+    results += [
+        {"type": "module", "id": mod.id, "code": mod.code, "name": mod.name}
+        for mod in modules[:limit]
+    ]
+    return results[:limit]
@@ -0,0 +1,379 @@
+"""Shared-memory (count, total) store of rating aggregates for multi-process deployments.
+
+Every worker maps the same file, so averages are computed once and stay consistent
+across processes. The layout is a fixed array of signed 64-bit words:
+
+    header  MAGIC, VERSION, professor slots, pair slots, ready, database tag,
+            highest professor id, generation (odd while a rebuild runs)
+    professor slot (indexed by professor id):      seq, count, total
+    pair slot (open addressing on the pair key):   seq, key, count, total
+
+Readers never lock: each slot is guarded by a sequence counter that writers make odd
+while they update it, and a reader retries when it sees an odd or changed counter.
+Writers serialise on an exclusive flock of the file. Whenever the store cannot answer
+(disabled, not built yet, slot table full, a read that keeps racing) callers fall back
+to the database.
+
+A rating write and its delta must not straddle a rebuild, or the rebuild could read
+the committed row and the delta would count it a second time. write_section() holds
+the write lock from before the database write until the delta is applied. A write
+inside a caller's transaction cannot hold it until that transaction commits; its
+delta carries the generation seen before the write instead, and apply() refuses it
+when a rebuild ran in between; the store then stays not ready, serving reads from the
+database, until a background rebuild (or warm-up, or check_aggregate_store --repair)
+loads it again.
+"""
+import fcntl
+import logging
+import mmap
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x52415447  # "RATG"
+VERSION = 1
+HEADER_WORDS = 8
+PROFESSOR_WORDS = 3
+PAIR_WORDS = 4
+WORD_SIZE = 8
+MAX_PROBES = 64
+READ_RETRIES = 100
+
+H_MAGIC, H_VERSION, H_PROFESSOR_SLOTS, H_PAIR_SLOTS, H_READY, H_DB_TAG, H_HIGH_WATER, H_GENERATION = range(8)
+
+
+def pair_key(professor_id, module_id):
+    return (professor_id << 32) | module_id
+
+
+def database_tag():
+    """Identifies the database a store was built from, so a file is never reused against another one."""
+    return zlib.crc32(str(connections["default"].settings_dict["NAME"]).encode())
+
+
+class StoreUnavailable(Exception):
+    """The store cannot answer this read; use the database instead."""
+
+
+class AggregateStore:
+
+    def __init__(self, path, professor_slots, pair_slots):
+        self.path = str(path)
+        self.professor_slots = professor_slots
+        self.pair_slots = pair_slots
+        self.db_tag = database_tag()
+        self.pair_base = HEADER_WORDS + professor_slots * PROFESSOR_WORDS
+        size = (self.pair_base + pair_slots * PAIR_WORDS) * WORD_SIZE
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.lock = _FileLock(self.fd)
+        self.map = None
+
+        # An already initialised file is mapped without the lock, so a process can open the
+        # store inside a database transaction without waiting for a rebuild to finish
+        if os.fstat(self.fd).st_size == size:
+            self._map(size)
+            if self._header_matches():
+                return
+
+        with self.locked():
+            if os.fstat(self.fd).st_size != size:
+                os.ftruncate(self.fd, 0)  # layout changed: start from zeros
+                os.ftruncate(self.fd, size)
+            if self.map is None:
+                self._map(size)
+            if not self._header_matches():
+                self.words[H_READY] = 0
+                self.words[H_MAGIC], self.words[H_VERSION] = MAGIC, VERSION
+                self.words[H_PROFESSOR_SLOTS], self.words[H_PAIR_SLOTS] = self.professor_slots, self.pair_slots
+
+    def _map(self, size):
+        self.map = mmap.mmap(self.fd, size)
+        self.words = memoryview(self.map).cast("q")
+
+    def _header_matches(self):
+        header = self.words[:H_PAIR_SLOTS + 1].tolist()
+        return header == [MAGIC, VERSION, self.professor_slots, self.pair_slots]
+
+    # Writers
+
+    def locked(self):
+        return self.lock
+
+    @property
+    def ready(self):
+        return self.words[H_READY] == 1 and self.words[H_DB_TAG] == self.db_tag
+
+    @property
+    def generation(self):
+        """Bumped to odd when a rebuild starts and to even when it ends."""
+        return self.words[H_GENERATION]
+
+    def invalidate(self):
+        with self.locked():
+            self.words[H_READY] = 0
+
+    def apply(self, changes, generation):
+        """Apply the (professor_id, module_id, count, total) deltas of one committed write.
+
+        generation is the value seen before the write reached the database. If a rebuild
+        started since, its load may already include the write: nothing is applied, the
+        store is marked not ready and False is returned so the caller can schedule a rebuild.
+        """
+        with self.locked():
+            if not self.ready:  # not built, or built from another database
+                return True
+            if generation is None or generation & 1 or generation != self.words[H_GENERATION]:
+                logger.info("A rating write overlapped an aggregate store rebuild; the store must be rebuilt")
+                self.words[H_READY] = 0
+                return False
+            for professor_id, module_id, count, total in changes:
+                if not self._add(professor_id, module_id, count, total):
+                    logger.warning("Aggregate store is full; falling back to the database until it is rebuilt")
+                    self.words[H_READY] = 0
+                    break
+            return True
+
+    def _add(self, professor_id, module_id, count, total):
+        if not 0 < professor_id < self.professor_slots:
+            return False
+        pair = self._find_pair(pair_key(professor_id, module_id), insert=True)
+        if pair is None:
+            return False
+
+        w = self.words
+        base = HEADER_WORDS + professor_id * PROFESSOR_WORDS
+        w[base] += 1
+        w[base + 1] += count
+        w[base + 2] += total
+        w[base] += 1
+
+        w[pair] += 1
+        w[pair + 2] += count
+        w[pair + 3] += total
+        w[pair] += 1
+
+        if professor_id > w[H_HIGH_WATER]:
+            w[H_HIGH_WATER] = professor_id
+        return True
+
+    def rebuild(self, load, force=True):
+        """Replace the whole contents with load() -> (professor_totals, pair_totals).
+
+        load() runs under the write lock, after the generation has been made odd. Writes
+        in a write_section() are then either fully in the load or start after it, and
+        deltas of other writes that overlap it are refused by apply(). Readers fall back
+        to the database meanwhile. With force=False a store that is already ready (built
+        by another worker) is kept.
+        """
+        with self.locked():
+            if not force and self.ready:
+                return True
+            w = self.words
+            w[H_READY] = 0
+            w[H_GENERATION] += 1 if w[H_GENERATION] % 2 == 0 else 2
+            professor_totals, pair_totals = load()
+            w[HEADER_WORDS:] = memoryview(bytes(len(w) * WORD_SIZE - HEADER_WORDS * WORD_SIZE)).cast("q")
+            w[H_HIGH_WATER] = 0
+
+            too_large = [professor_id for professor_id in professor_totals if not 0 < professor_id < self.professor_slots]
+            if too_large:
+                logger.warning("Professor id %d exceeds the aggregate store; reads stay on the database", max(too_large))
+                w[H_GENERATION] += 1
+                return False
+
+            for (professor_id, module_id), (count, total) in pair_totals.items():
+                pair = self._find_pair(pair_key(professor_id, module_id), insert=True)
+                if pair is None:
+                    logger.warning("Aggregate store too small for %d pairs; reads stay on the database", len(pair_totals))
+                    w[H_GENERATION] += 1
+                    return False
+                w[pair + 2], w[pair + 3] = count, total
+
+            for professor_id, (count, total) in professor_totals.items():
+                base = HEADER_WORDS + professor_id * PROFESSOR_WORDS
+                w[base + 1], w[base + 2] = count, total
+                if professor_id > w[H_HIGH_WATER]:
+                    w[H_HIGH_WATER] = professor_id
+
+            w[H_DB_TAG] = self.db_tag
+            w[H_GENERATION] += 1
+            w[H_READY] = 1
+            self.map.flush()
+            return True
+
+    # Lock-free readers
+
+    def _find_pair(self, key, insert):
+        w = self.words
+        slot = ((key * 0x9E3779B97F4A7C15) >> 32) % self.pair_slots
+        for probe in range(MAX_PROBES):
+            base = self.pair_base + ((slot + probe) % self.pair_slots) * PAIR_WORDS
+            found = w[base + 1]
+            if found == key:
+                return base
+            if found == 0:
+                if not insert:
+                    return None
+                w[base + 1] = key
+                return base
+        return None
+
+    def _read_slot(self, seq_word, count_word):
+        w = self.words
+        for _ in range(READ_RETRIES):
+            seq = w[seq_word]
+            if seq & 1:
+                continue
+            count, total = w[count_word], w[count_word + 1]
+            if w[seq_word] == seq:
+                return count, total
+        raise StoreUnavailable("slot kept changing while being read")
+
+    def _begin_read(self):
+        generation = self.words[H_GENERATION]
+        if generation & 1 or not self.ready:
+            raise StoreUnavailable("store not built")
+        return generation
+
+    def _end_read(self, generation):
+        if self.words[H_GENERATION] != generation or not self.ready:
+            raise StoreUnavailable("store was rebuilt during the read")
+
+    def professor_totals(self):
+        """professor_id -> (count, total) for every professor with at least one rating."""
+        generation = self._begin_read()
+        start = HEADER_WORDS + PROFESSOR_WORDS  # slot 0 is never used, ids start at 1
+        end = HEADER_WORDS + (self.words[H_HIGH_WATER] + 1) * PROFESSOR_WORDS
+        snapshot = self.words[start:end].tolist()
+        seqs = self.words[start:end].tolist()[0::PROFESSOR_WORDS]
+
+        totals = {}
+        for slot, index in enumerate(range(0, len(snapshot), PROFESSOR_WORDS)):
+            seq, count, total = snapshot[index:index + PROFESSOR_WORDS]
+            if seq & 1 or seqs[slot] != seq:
+                count, total = self._read_slot(start + index, start + index + 1)
+            if count:
+                totals[slot + 1] = (count, total)
+
+        self._end_read(generation)
+        return totals
+
+    def pair_totals(self, pairs=None):
+        """(professor_id, module_id) -> (count, total) for the given pairs that have ratings.
+
+        Only the requested pairs are probed; without pairs, every stored pair is returned.
+        """
+        if pairs is None:
+            return self._all_pairs()
+
+        generation = self._begin_read()
+        totals = {}
+        for professor_id, module_id in pairs:
+            base = self._find_pair(pair_key(professor_id, module_id), insert=False)
+            if base is None:
+                continue
+            count, total = self._read_slot(base, base + 2)
+            if count:
+                totals[(professor_id, module_id)] = (count, total)
+
+        self._end_read(generation)
+        return totals
+
+    def _all_pairs(self):
+        generation = self._begin_read()
+        snapshot = self.words[self.pair_base:].tolist()
+        seqs = self.words[self.pair_base:].tolist()[0::PAIR_WORDS]
+
+        totals = {}
+        for slot, index in enumerate(range(0, len(snapshot), PAIR_WORDS)):
+            seq, key, count, total = snapshot[index:index + PAIR_WORDS]
+            if not key:  # keys are only set by inserts and cleared by rebuilds
+                continue
+            if seq & 1 or seqs[slot] != seq:
+                count, total = self._read_slot(self.pair_base + index, self.pair_base + index + 2)
+            if count:
+                totals[(key >> 32, key & 0xFFFFFFFF)] = (count, total)
+
+        self._end_read(generation)
+        return totals
+
+
+class _FileLock:
+    """Exclusive flock of the store file, re-entrant within a thread.
+
+    Threads of one process share the open file, and flock() would let all of them in
+    at once, so they also serialise on a process-local lock.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.mutex = threading.RLock()
+        self.depth = 0
+
+    def __enter__(self):
+        self.mutex.acquire()
+        if self.depth == 0:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            except BaseException:
+                self.mutex.release()
+                raise
+        self.depth += 1
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.mutex.release()
+
+
+_store = None
+_store_key = None
+
+
+def get_store():
+    """The per-process handle on the shared store, or None when it is disabled or cannot be opened.
+
+    The file is reopened after a fork: flock() locks belong to the open file, so a
+    handle inherited from a preloading master would not exclude sibling workers.
+    """
+    global _store, _store_key
+    config = getattr(settings, "RATINGS_AGGREGATE_STORE", None)
+    if not config or not config.get("PATH"):
+        return None
+    key = (str(config["PATH"]), os.getpid())
+    if _store_key == key:
+        return _store
+
+    try:
+        _store = AggregateStore(config["PATH"], config.get("PROFESSOR_SLOTS", 65536), config.get("PAIR_SLOTS", 262144))
+    except OSError:
+        logger.warning("Could not open the aggregate store at %s; using the database", config["PATH"], exc_info=True)
+        _store = None
+    _store_key = key
+    return _store
+
+
+@contextmanager
+def write_section(using="default"):
+    """Run a rating write so that it commits and its store delta is applied under the write lock.
+
+    Inside a caller's transaction the commit happens later, outside this block, so the
+    lock is not taken; the generation check in AggregateStore.apply() covers that case.
+    """
+    store = get_store()
+    if store is None or transaction.get_connection(using).in_atomic_block:
+        yield
+        return
+    # In autocommit mode the write commits straight away and its on_commit delta runs
+    # right after it, both before the lock is released. No transaction is opened here:
+    # on SQLite a read-then-write transaction waiting on another writer can deadlock.
+    with store.locked():
+        yield
@@ -0,0 +1,88 @@
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .aggregates import schedule_rebuild
+from .models import ArchivedAggregate, Professor, Module, Rating
+from .sharedstore import get_store
+from . import search
+
+
+# Keep the full-text search index in step with professor and module names, on the
+# database the row was written to
+@receiver(post_save, sender=Professor)
+def index_professor(sender, instance, using, **kwargs):
+    search.index_professor(instance, connections[using])
+
+
+@receiver(post_delete, sender=Professor)
+def unindex_professor(sender, instance, using, **kwargs):
+    search.remove_from_index("professor", instance.id, connections[using])
+
+
+@receiver(post_save, sender=Module)
+def index_module(sender, instance, using, **kwargs):
+    search.index_module(instance, connections[using])
+
+
+@receiver(post_delete, sender=Module)
+def unindex_module(sender, instance, using, **kwargs):
+    search.remove_from_index("module", instance.id, connections[using])
+
+
+# Keep the shared aggregate store in step with ratings, once the change is committed.
+# The store generation is noted before the write reaches the database so that a delta
+# overlapping a rebuild is detected (see ratings.sharedstore). Such a delta leaves the
+# store not ready, and it is rebuilt in the background rather than in the request.
+def _note_generation(instance):
+    store = get_store()
+    if store is not None:
+        instance._store_generation = store.generation
+
+
+def _store_apply(instance, changes):
+    store = get_store()
+    if store is None:
+        return
+    generation = getattr(instance, "_store_generation", None)
+
+    def apply():
+        if not store.apply(changes, generation):
+            schedule_rebuild()
+
+    transaction.on_commit(apply)
+
+
+@receiver(pre_save, sender=Rating)
+def remember_old_rating(sender, instance, **kwargs):
+    _note_generation(instance)
+    if get_store() is not None and instance.pk is not None:
+        instance._stored_rating = (
+            Rating.objects.filter(pk=instance.pk).values_list("professor_id", "module_id", "rating").first()
+        )
+
+
+@receiver(post_save, sender=Rating)
+def store_rating(sender, instance, created, **kwargs):
+    changes = []
+    old = getattr(instance, "_stored_rating", None)
+    if not created and old is not None:
+        changes.append((old[0], old[1], -1, -old[2]))
+    changes.append((instance.professor_id, instance.module_id, 1, int(instance.rating)))
+    _store_apply(instance, changes)
+
+
+@receiver(pre_delete, sender=Rating)
+@receiver(pre_delete, sender=ArchivedAggregate)
+def remember_generation(sender, instance, **kwargs):
+    _note_generation(instance)
+
+
+@receiver(post_delete, sender=Rating)
+def unstore_rating(sender, instance, **kwargs):
+    _store_apply(instance, [(instance.professor_id, instance.module_id, -1, -int(instance.rating))])
+
+
+@receiver(post_delete, sender=ArchivedAggregate)
+def unstore_archived_aggregate(sender, instance, **kwargs):
+    _store_apply(instance, [(instance.professor_id, instance.module_id, -instance.count, -instance.total)])
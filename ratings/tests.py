@@ -1,3 +1,629 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+import threading
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import Client, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+import client
+import loadgen
+
+from . import aggregates, views
+from .paginators import EstimatedCountPaginator
+from .models import ArchiveCutoff, ArchivedAggregate, Professor, Module, Rating
+from .sharedstore import AggregateStore, StoreUnavailable, get_store
+from .warmup import WARMUP_STEPS
+
+
+class RatingsTestCase(TestCase):
+    """A small catalogue: two professors teaching three modules across two years."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.smith = Professor.objects.create(name="Dr Smith")
+        cls.jones = Professor.objects.create(name="Dr Jones")
+
+        cls.old = Module.objects.create(code="CS1001", name="Intro", year=2022, semester=1)
+        cls.current = Module.objects.create(code="CS2002", name="Algorithms", year=2024, semester=1)
+        cls.other = Module.objects.create(code="CS3003", name="Databases", year=2024, semester=2)
+        cls.old.professors.add(cls.smith, cls.jones)
+        cls.current.professors.add(cls.smith)
+        cls.other.professors.add(cls.jones)
+
+        cls.users = [User.objects.create_user(f"student{i}", password="pass") for i in range(3)]
+        for user, rating in zip(cls.users, (5, 4, 2)):
+            Rating.objects.create(user=user, professor=cls.smith, module=cls.old, rating=rating)
+        Rating.objects.create(user=cls.users[0], professor=cls.smith, module=cls.current, rating=3)
+        Rating.objects.create(user=cls.users[0], professor=cls.jones, module=cls.other, rating=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def get_streamed(self, path, **params):
+        """GET a streamed list endpoint and decode the whole JSON body."""
+        response = self.client.get(path, params)
+        self.assertTrue(response.streaming)
+        return json.loads(b"".join(response.streaming_content))
+
+
+class BatchViewTests(RatingsTestCase):
+
+    def batch(self, queries):
+        return self.client.post("/api/batch/", {"queries": queries}, format="json")
+
+    def test_dashboard_batch_uses_a_bounded_number_of_queries(self):
+        # The client's dashboard: compact professors plus every taught pair's average
+        queries = [{"type": "professors", "format": "compact"}, {"type": "module_averages"}]
+        with self.assertNumQueries(13):
+            response = self.batch(queries)
+        self.assertEqual(response.status_code, 200)
+
+        # Repeated list queries and any number of averages share the same queries
+        queries += [{"type": "professors", "format": "compact"}, {"type": "module_averages"}]
+        queries += [{"type": "average", "professor": self.smith.id, "module": "CS2002"}] * 20
+        with self.assertNumQueries(13):
+            response = self.batch(queries)
+        self.assertEqual(len(response.json()["results"]), 24)
+
+        # ... and so do more professors and modules
+        for i in range(10):
+            professor = Professor.objects.create(name=f"Dr Extra {i}")
+            Module.objects.create(code=f"EX{i}", name=f"Extra {i}", year=2024, semester=1).professors.add(professor)
+        with self.assertNumQueries(13):
+            self.batch(queries)
+
+    def test_results_match_single_requests(self):
+        results = self.batch([
+            {"type": "average", "professor": self.smith.id, "module": "CS1001"},
+            {"type": "module_averages"},
+        ]).json()["results"]
+
+        single = self.client.get(f"/api/ratings/{self.smith.id}/CS1001/").json()
+        self.assertEqual(results[0], {"status": 200, "data": single})
+        self.assertEqual(single["average_rating"], 4)  # (5 + 4 + 2) / 3 rounded
+
+        pairs = {(row["professor_id"], row["module_code"]): row["average_rating"] for row in results[1]["data"]}
+        self.assertEqual(pairs[(self.smith.id, "CS1001")], 4)
+        self.assertEqual(pairs[(self.jones.id, "CS1001")], "No ratings yet")
+        self.assertEqual(len(pairs), 4)
+
+    def test_list_queries_are_paged(self):
+        def pages(query):
+            data, after = [], 0
+            while after is not None:
+                result = self.batch([{**query, "after": after}]).json()["results"][0]
+                data.append(result["data"])
+                after = result["next"]
+            return data
+
+        everything = self.batch([{"type": "module_averages"}]).json()["results"][0]
+        self.assertIsNone(everything["next"])
+
+        with mock.patch("ratings.views.BATCH_PAGE_SIZE", 2):
+            averages = pages({"type": "module_averages", "limit": 100})
+            professors = pages({"type": "professors", "format": "compact"})
+            modules = pages({"type": "modules"})
+
+        self.assertEqual(len(averages), 2)  # three modules, two per page
+        self.assertEqual([row for page in averages for row in page], everything["data"])
+        self.assertEqual([row[0] for page in professors for row in page["rows"]], [self.smith.id, self.jones.id])
+        self.assertEqual([module["code"] for page in modules for module in page], ["CS1001", "CS2002", "CS3003"])
+
+    def test_per_item_errors(self):
+        results = self.batch([
+            {"type": "average", "professor": 9999, "module": "CS1001"},
+            {"type": "average", "professor": self.smith.id, "module": "NOPE"},
+            {"type": "average", "module": "CS1001"},
+            {"type": "average", "professor": "abc", "module": "CS1001"},
+            {"type": "average", "professor": self.smith.id, "module": "CS1001", "year": [2022]},
+            {"type": "average", "professor": self.smith.id, "module": "CS1001", "semester": {"n": 1}},
+            {"type": "unknown"},
+            {"type": "modules", "after": "x"},
+            "not a query",
+            {"type": "average", "professor": self.smith.id, "module": "CS1001"},
+        ]).json()["results"]
+
+        self.assertEqual([result["status"] for result in results], [404, 404, 400, 400, 400, 400, 400, 400, 400, 200])
+        self.assertEqual(results[0]["data"]["detail"], "❌ Professor not found.")
+        self.assertEqual(results[1]["data"]["detail"], "❌ Module not found.")
+
+    def test_bare_list_of_queries(self):
+        response = self.client.post(
+            "/api/batch/", [{"type": "average", "professor": self.smith.id, "module": "CS1001"}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["data"]["average_rating"], 4)
+
+    def test_invalid_batches(self):
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.batch([{"type": "modules"}] * 51).status_code, 400)
+        self.assertEqual(self.client.post("/api/batch/", "5", content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.post("/api/batch/", {"queries": "modules"}, format="json").status_code, 400)
+
+
+class SearchIndexTests(RatingsTestCase):
+
+    def search(self, query):
+        return [(row["type"], row["id"]) for row in self.client.get("/api/search/", {"q": query}).json()["results"]]
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertIn(("professor", self.smith.id), self.search("smi"))
+        self.assertIn(("module", self.current.id), self.search("cs20"))
+
+        self.smith.name = "Dr Baker"
+        self.smith.save()
+        self.assertEqual(self.search("smi"), [])
+        self.assertEqual(self.search("bak"), [("professor", self.smith.id)])
+
+        self.current.delete()
+        self.assertEqual(self.search("cs20"), [])
+        self.assertIn(("module", self.old.id), self.search("cs10"))
+
+    def test_professor_and_module_with_the_same_id_are_separate_rows(self):
+        module = Module.objects.get(id=self.smith.id)
+        module.name = "Smithing"
+        module.save()
+        self.assertEqual(sorted(self.search("smith")), [("module", module.id), ("professor", self.smith.id)])
+
+        self.smith.delete()
+        self.assertEqual(self.search("smith"), [("module", module.id)])
+
+    def test_receivers_write_to_the_rows_database(self):
+        with mock.patch("ratings.search.index_professor") as index_professor:
+            self.smith.save(using="default")
+        index_professor.assert_called_once_with(self.smith, connection)
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM ratings_search")
+        self.assertEqual(self.search("smi"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", "--database", "default", stdout=out)
+        self.assertIn("Indexed 5 professors and modules.", out.getvalue())
+        self.assertEqual(self.search("smi"), [("professor", self.smith.id)])
+
+
+class ArchiveRatingsTests(RatingsTestCase):
+
+    def archive(self, before=2023):
+        call_command("archive_ratings", "--before", str(before), stdout=StringIO())
+
+    def averages(self):
+        professors = self.get_streamed("/api/professors/", format="compact")["rows"]
+        pairs = [
+            self.client.get(f"/api/ratings/{professor.id}/{module.code}/").json()["average_rating"]
+            for professor, module in ((self.smith, self.old), (self.smith, self.current), (self.jones, self.other))
+        ]
+        return [row[2:4] for row in professors], pairs
+
+    def test_averages_unchanged_after_archiving(self):
+        before = self.averages()
+        self.archive()
+
+        self.assertEqual(self.averages(), before)
+        self.assertFalse(Rating.objects.filter(module=self.old).exists())
+        self.assertEqual(Rating.objects.count(), 2)
+        aggregate = ArchivedAggregate.objects.get(professor=self.smith, module=self.old)
+        self.assertEqual((aggregate.count, aggregate.total), (3, 11))
+
+    def test_rearchiving_folds_late_ratings_into_frozen_totals(self):
+        self.archive()
+        late = User.objects.create_user("late", password="pass")
+        Rating.objects.create(user=late, professor=self.smith, module=self.old, rating=1)
+        self.archive()
+
+        aggregate = ArchivedAggregate.objects.get(professor=self.smith, module=self.old)
+        self.assertEqual((aggregate.count, aggregate.total), (4, 12))
+        self.assertEqual(ArchivedAggregate.objects.count(), 1)
+        self.assertFalse(Rating.objects.filter(module=self.old).exists())
+        self.assertEqual(self.averages()[1][0], 3)  # 12 / 4
+
+    def test_rating_an_archived_module_is_rejected(self):
+        self.archive()
+        self.client.force_authenticate(self.users[1])
+        response = self.client.post("/api/rate/", {
+            "professor": self.jones.id, "module": "CS1001", "year": 2022, "semester": 1, "rating": 5,
+        }, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("closed", response.json()["detail"])
+        self.assertFalse(Rating.objects.filter(module=self.old).exists())
+
+        # Live modules still take ratings
+        response = self.client.post("/api/rate/", {
+            "professor": self.jones.id, "module": "CS3003", "year": 2024, "semester": 2, "rating": 5,
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_archived_year_without_ratings_is_closed(self):
+        unrated = Module.objects.create(code="CS1111", name="Unrated", year=2022, semester=2)
+        unrated.professors.add(self.jones)
+        self.archive()
+        self.assertFalse(ArchivedAggregate.objects.filter(module=unrated).exists())
+
+        response = self.client.post("/api/rate/", {
+            "professor": self.jones.id, "module": "CS1111", "year": 2022, "semester": 2, "rating": 5,
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("closed", response.json()["detail"])
+
+    def test_archiving_nothing_still_closes_the_years(self):
+        self.archive(before=2020)
+        self.assertEqual(ArchiveCutoff.closed_before(), 2020)
+        self.assertEqual(ArchivedAggregate.objects.count(), 0)
+        self.assertEqual(Rating.objects.count(), 5)
+
+
+class WarmUpTests(TestCase):
+
+    def test_database_step_only_runs_bounded_reads(self):
+        step = dict(WARMUP_STEPS)["database"]
+        with CaptureQueriesContext(connection) as queries:
+            step()
+        self.assertEqual(len(queries), 3)
+        for query in queries.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"].upper())
+            self.assertIn("LIMIT 1", query["sql"])
+
+
+class AggregateStoreTestMixin:
+    """Points RATINGS_AGGREGATE_STORE at a small store in a fresh temporary file."""
+
+    store_slots = {"PROFESSOR_SLOTS": 64, "PAIR_SLOTS": 64}
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store_path = Path(directory.name) / "aggregates"
+        settings = override_settings(RATINGS_AGGREGATE_STORE={"PATH": str(self.store_path), **self.store_slots})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def assertStoreMatchesDatabase(self):
+        store = get_store()
+        self.assertTrue(store.ready)
+        self.assertEqual(store.professor_totals(), aggregates.professor_totals_db())
+        self.assertEqual(store.pair_totals(), aggregates.pair_totals_db())
+
+
+class AggregateStoreTests(AggregateStoreTestMixin, RatingsTestCase):
+
+    def test_store_follows_create_update_delete(self):
+        self.assertTrue(aggregates.rebuild_store())
+        self.assertStoreMatchesDatabase()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rating = Rating.objects.create(user=self.users[1], professor=self.smith, module=self.current, rating=5)
+        self.assertStoreMatchesDatabase()
+        self.assertEqual(get_store().pair_totals({(self.smith.id, self.current.id)}), {(self.smith.id, self.current.id): (2, 8)})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.rating = 1
+            rating.module = self.other
+            rating.save()
+        self.assertStoreMatchesDatabase()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.delete()
+            Rating.objects.filter(professor=self.jones).delete()
+        self.assertStoreMatchesDatabase()
+        self.assertNotIn(self.jones.id, get_store().professor_totals())
+
+    def test_rolled_back_writes_leave_the_store_alone(self):
+        aggregates.rebuild_store()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Rating.objects.create(user=self.users[1], professor=self.smith, module=self.current, rating=5)
+                raise RuntimeError("roll back")
+        self.assertEqual(get_store().professor_totals()[self.smith.id], (4, 14))
+        self.assertStoreMatchesDatabase()
+
+    def test_delta_overlapping_a_rebuild_is_not_counted_twice(self):
+        aggregates.rebuild_store()
+        with mock.patch("ratings.signals.schedule_rebuild") as schedule_rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                Rating.objects.create(user=self.users[1], professor=self.smith, module=self.current, rating=5)
+                # This connection already sees the new row, as a rebuild would after its commit
+                aggregates.rebuild_store()
+
+        # The delta was refused: no rebuild in the request, reads use the database meanwhile
+        schedule_rebuild.assert_called_once_with()
+        self.assertFalse(get_store().ready)
+        self.assertEqual(aggregates.professor_totals()[self.smith.id], (5, 19))
+
+        aggregates.rebuild_store(force=False)  # what the scheduled rebuild runs
+        self.assertStoreMatchesDatabase()
+        self.assertEqual(get_store().professor_totals()[self.smith.id], (5, 19))
+
+    def test_deltas_from_another_database_are_ignored(self):
+        aggregates.rebuild_store()
+        before = get_store().professor_totals()
+
+        other = AggregateStore(self.store_path, **{key.lower(): value for key, value in self.store_slots.items()})
+        other.db_tag += 1  # e.g. a management command run against another database
+        self.assertFalse(other.ready)
+        other.apply([(self.smith.id, self.old.id, 1, 5)], other.generation)
+        with self.assertRaises(StoreUnavailable):
+            other.professor_totals()
+
+        self.assertEqual(get_store().professor_totals(), before)
+        self.assertStoreMatchesDatabase()
+
+    def test_rebuild_fails_when_the_store_is_too_small(self):
+        self.store_slots = {"PROFESSOR_SLOTS": 64, "PAIR_SLOTS": 2}
+        self.setUp()
+        with self.assertLogs("ratings.sharedstore", "WARNING"):
+            self.assertFalse(aggregates.rebuild_store())
+        self.assertFalse(get_store().ready)
+        # Reads fall back to the database
+        self.assertEqual(aggregates.professor_totals(), aggregates.professor_totals_db())
+        self.assertEqual(self.client.get(f"/api/ratings/{self.smith.id}/CS1001/").json()["average_rating"], 4)
+
+    def test_rebuild_fails_for_professor_ids_beyond_the_store(self):
+        self.store_slots = {"PROFESSOR_SLOTS": self.jones.id, "PAIR_SLOTS": 64}
+        self.setUp()
+        with self.assertLogs("ratings.sharedstore", "WARNING"):
+            self.assertFalse(aggregates.rebuild_store())
+        self.assertFalse(get_store().ready)
+
+    def test_check_aggregate_store_repair(self):
+        aggregates.rebuild_store()
+        call_command("check_aggregate_store", stdout=StringIO())
+
+        store = get_store()
+        store.apply([(self.smith.id, self.old.id, 2, 3), (self.jones.id, self.current.id, 1, 1)], store.generation)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("check_aggregate_store", stdout=out)
+        self.assertIn("4 aggregate(s) differ", out.getvalue())
+
+        call_command("check_aggregate_store", "--repair", stdout=StringIO())
+        self.assertStoreMatchesDatabase()
+        call_command("check_aggregate_store", stdout=StringIO())
+
+    def test_reads_match_the_database(self):
+        with_store_off = self.get_streamed("/api/professors/", format="compact")
+        aggregates.rebuild_store()
+        self.assertEqual(self.get_streamed("/api/professors/", format="compact"), with_store_off)
+        results = self.client.post("/api/batch/", {"queries": [{"type": "module_averages"}]}, format="json").json()
+        self.assertEqual(len(results["results"][0]["data"]), 4)
+
+    def test_all_pairs_rereads_slots_written_during_the_snapshot(self):
+        aggregates.rebuild_store()
+        store = get_store()
+        stale = store.words[store.pair_base:].tolist()
+        store.apply([(self.smith.id, self.old.id, 1, 1)], store.generation)  # lands after the snapshot was taken
+
+        class StaleSnapshot:
+            """The store's words, except that the first slice is the one taken before the write."""
+            def __getitem__(self, item):
+                if isinstance(item, slice) and stale:
+                    snapshot = stale.copy()
+                    stale.clear()
+                    return mock.Mock(tolist=lambda: snapshot)
+                return words[item]
+
+        words = store.words
+        with mock.patch.object(store, "words", StaleSnapshot()):
+            totals = store.pair_totals()
+        self.assertEqual(totals[(self.smith.id, self.old.id)], (4, 12))
+
+
+class AggregateStoreAutocommitTests(AggregateStoreTestMixin, TransactionTestCase):
+    """Outside a transaction a write and its delta happen under the store lock."""
+
+    def test_write_and_delta_are_applied_together(self):
+        professor = Professor.objects.create(name="Dr Autocommit")
+        module = Module.objects.create(code="AC1", name="Autocommit", year=2024, semester=1)
+        user = User.objects.create_user("autocommit")
+        aggregates.rebuild_store()
+        store = get_store()
+
+        rating = Rating.objects.create(user=user, professor=professor, module=module, rating=4)
+        self.assertEqual(store.professor_totals(), {professor.id: (1, 4)})
+        self.assertEqual(store.lock.depth, 0)
+
+        with self.assertRaises(Exception):
+            Rating.objects.create(user=user, professor=professor, module=module, rating=2)  # duplicate
+        self.assertEqual(store.lock.depth, 0)
+
+        rating.delete()
+        self.assertEqual(store.professor_totals(), {})
+        self.assertTrue(store.ready)
+
+    def test_scheduled_rebuild_runs_in_the_background(self):
+        professor = Professor.objects.create(name="Dr Background")
+        module = Module.objects.create(code="BG1", name="Background", year=2024, semester=1)
+        Rating.objects.create(user=User.objects.create_user("background"), professor=professor, module=module, rating=3)
+        store = get_store()
+        store.invalidate()
+
+        aggregates.schedule_rebuild()
+        for thread in threading.enumerate():
+            if thread.name == "aggregate-store-rebuild":
+                thread.join(timeout=10)
+        self.assertStoreMatchesDatabase()
+        self.assertEqual(store.professor_totals(), {professor.id: (1, 3)})
+
+
+class CompressionAndCompactFormatTests(RatingsTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(20):
+            Module.objects.create(code=f"EX{i:02}", name=f"Extra module {i}", year=2024, semester=1).professors.add(cls.smith)
+
+    def get(self, path, **params):
+        return self.client.get(path, params, HTTP_ACCEPT_ENCODING="gzip")
+
+    def test_large_response_is_gzipped(self):
+        response = self.get("/api/modules/", format="compact")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        data = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+        self.assertEqual(len(data["rows"]), 23)
+
+    def test_small_response_is_not_compressed(self):
+        response = self.get("/api/ratings/9999/CS1001/")
+        self.assertLess(len(response.content), 200)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.json()["detail"], "❌ Professor not found.")
+
+    def test_streamed_list_is_gzipped(self):
+        response = self.get("/api/modules/")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        data = json.loads(gzip.decompress(b"".join(response.streaming_content)))
+        self.assertEqual([module["code"] for module in data[:3]], ["CS1001", "CS2002", "CS3003"])
+
+    def test_compact_modules_shape(self):
+        data = self.get_streamed("/api/modules/", format="compact")
+        self.assertEqual(data["fields"], ["id", "code", "name", "year", "semester", "professors"])
+        rows = client.compact_rows(data)
+        self.assertEqual(rows[0], {
+            "id": self.old.id, "code": "CS1001", "name": "Intro", "year": 2022, "semester": 1,
+            "professors": [self.smith.id, self.jones.id],
+        })
+        self.assertEqual(data["professors"], {str(self.smith.id): "Dr Smith", str(self.jones.id): "Dr Jones"})
+
+    def test_compact_professors_shape(self):
+        data = self.get_streamed("/api/professors/", format="compact")
+        self.assertEqual(data["fields"], ["id", "name", "average", "count", "modules"])
+        smith, jones = client.compact_rows(data)
+        self.assertEqual(smith["average"], 3.5)  # (5 + 4 + 2 + 3) / 4
+        self.assertEqual((smith["count"], len(smith["modules"])), (4, 22))
+        self.assertEqual(jones, {"id": self.jones.id, "name": "Dr Jones", "average": 1.0, "count": 1,
+                                 "modules": [self.old.id, self.other.id]})
+        self.assertEqual(data["modules"][str(self.old.id)], ["CS1001", "Intro"])
+
+    def test_plain_json_lists_stream_the_list_data(self):
+        modules = self.get_streamed("/api/modules/")
+        self.assertEqual(modules, views.module_list_data())
+        self.assertEqual(modules[0], {
+            "code": "CS1001", "name": "Intro", "year": 2022, "semester": 1,
+            "professors": [{"id": self.smith.id, "name": "Dr Smith"}, {"id": self.jones.id, "name": "Dr Jones"}],
+        })
+
+        professors = self.get_streamed("/api/professors/")
+        self.assertEqual(professors, views.professor_list_data())
+        self.assertEqual(professors[1], {
+            "id": self.jones.id, "name": "Dr Jones", "average_rating": "⭐ (Unbearable)",
+            "modules": [{"code": "CS1001", "name": "Intro"}, {"code": "CS3003", "name": "Databases"}],
+        })
+
+    def test_streamed_compact_matches_the_batch_payload(self):
+        for path, build in (("/api/modules/", views.module_list_compact), ("/api/professors/", views.professor_list_compact)):
+            with self.subTest(path=path):
+                self.assertEqual(self.get_streamed(path, format="compact"), json.loads(json.dumps(build())))
+
+    def test_compact_average_renders_like_the_full_format(self):
+        # 1399 / 400 = 3.4975: rounding to 3.5 first would make the client show 4 stars
+        with mock.patch("ratings.views.professor_totals", return_value={self.smith.id: (400, 1399)}):
+            full = self.get_streamed("/api/professors/")
+            compact = client.compact_rows(self.get_streamed("/api/professors/", format="compact"))
+
+        self.assertEqual(full[0]["average_rating"], "⭐⭐⭐ (Decent)")
+        self.assertEqual(client.render_rating(compact[0]["average"]), full[0]["average_rating"])
+
+
+@unittest.skipUnless(settings.ENABLE_ADMIN, "admin disabled")
+class AdminTests(RatingsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = Client()
+        self.admin.force_login(User.objects.create_superuser("admin", password="pass"))
+
+    def add_ratings(self, n):
+        users = User.objects.bulk_create([User(username=f"bulk{len(self.users)}_{i}") for i in range(n)])
+        self.users = self.users + users
+        Rating.objects.bulk_create([Rating(user=user, professor=self.jones, module=self.old, rating=3) for user in users])
+
+    @mock.patch("ratings.paginators.EXACT_COUNT_THRESHOLD", 10)
+    def test_rating_changelist_has_no_per_row_queries_or_count(self):
+        for extra in (20, 60):
+            self.add_ratings(extra)
+            # session, user, the two filters' choices, the id-range estimate and the page
+            with CaptureQueriesContext(connection) as queries, self.assertNumQueries(6):
+                response = self.admin.get("/admin/ratings/rating/")
+            self.assertContains(response, "bulk")
+            for query in queries.captured_queries:
+                self.assertNotIn("COUNT(", query["sql"].upper())
+
+    def test_paginator_counts_exactly_when_filtered(self):
+        with mock.patch("ratings.paginators.EXACT_COUNT_THRESHOLD", 1):
+            unfiltered = EstimatedCountPaginator(Rating.objects.order_by("id"), 10)
+            filtered = EstimatedCountPaginator(Rating.objects.filter(rating=5).order_by("id"), 10)
+            Rating.objects.filter(rating=4).delete()  # a hole in the ids: the estimate is now too high
+
+            self.assertEqual(unfiltered.count, 5)  # estimated from the id range
+            self.assertEqual(filtered.count, 1)
+
+    def test_archived_aggregates_are_read_only(self):
+        aggregate = ArchivedAggregate.objects.create(
+            professor=self.smith, module=self.old, year=2022, semester=1, count=3, total=11,
+        )
+        self.assertEqual(self.admin.get("/admin/ratings/archivedaggregate/add/").status_code, 403)
+        url = f"/admin/ratings/archivedaggregate/{aggregate.id}/change/"
+        self.assertNotContains(self.admin.get(url), 'name="count"')
+        self.assertEqual(self.admin.post(url, {"count": 30, "total": 110}).status_code, 403)
+        aggregate.refresh_from_db()
+        self.assertEqual((aggregate.count, aggregate.total), (3, 11))
+
+    def test_module_form_autocompletes_professors(self):
+        response = self.admin.get(f"/admin/ratings/module/{self.old.id}/change/")
+        self.assertContains(response, "admin-autocomplete")
+        self.assertNotContains(response, "SelectFilter")
+
+
+class LoadgenHelperTests(SimpleTestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadgen.percentile([], 50), 0.0)
+        self.assertEqual(loadgen.percentile([7], 99), 7)
+        self.assertEqual(loadgen.percentile(values, 0), 1)
+        self.assertEqual(loadgen.percentile(values, 50), 51)
+        self.assertEqual(loadgen.percentile(values, 100), 100)
+
+    def test_histogram(self):
+        buckets = dict(loadgen.histogram([0.5, 1, 1.5, 30, 30, 9000]))
+        self.assertEqual(list(buckets), loadgen.HISTOGRAM_BUCKETS)
+        self.assertEqual(buckets[1], 2)  # bounds are inclusive
+        self.assertEqual(buckets[2], 1)
+        self.assertEqual(buckets[50], 2)
+        self.assertEqual(buckets[float("inf")], 1)
+        self.assertEqual(sum(buckets.values()), 6)
+
+    def test_parse_mix(self):
+        self.assertEqual(loadgen.parse_mix("modules=3, rate"), (["modules", "rate"], [3.0, 1.0]))
+        with self.assertRaises(loadgen.argparse.ArgumentTypeError):
+            loadgen.parse_mix("modules=3,nope=1")
+
+    def test_endpoint_label(self):
+        self.assertEqual(loadgen.endpoint_label("GET", "/ratings/3/CS3021/"), "GET /ratings/{professor_id}/{module_code}/")
+        self.assertEqual(loadgen.endpoint_label("GET", "/modules/?format=compact"), "GET /modules/")
+        self.assertEqual(loadgen.endpoint_label("POST", "/rate/"), "POST /rate/")
+
+    def test_failed_logins_back_off(self):
+        args = mock.Mock(mix=(["modules"], [1.0]), sessions=5, actions=1, think=(0.0, 0.0), timeout=1, base_url="")
+        with mock.patch.object(loadgen, "VirtualUser") as user, mock.patch.object(loadgen.time, "sleep") as sleep:
+            user.return_value.login.return_value = False
+            loadgen.run_user(args, None, None, loadgen.time.monotonic() + 3600, seed=1)
+
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0, 8.0])
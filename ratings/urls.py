@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework.authtoken.views import obtain_auth_token 
-from .views import api_root, RegisterView, ModuleListView, ProfessorListView, ProfessorRatingView, RateProfessorView, LogoutView
+from .views import api_root, RegisterView, ModuleListView, ProfessorListView, ProfessorRatingView, RateProfessorView, LogoutView, BatchView, SearchView
 
 urlpatterns = [
     path('', api_root, name='api-root'),  # API root
@@ -9,6 +9,8 @@ urlpatterns = [
     path('professors/', ProfessorListView.as_view(), name='professors-list'),
     path('ratings/<int:professor_id>/<str:module_code>/', ProfessorRatingView.as_view(), name='professor-rating'),
     path('rate/', RateProfessorView.as_view(), name='rate-professor'),
+    path('batch/', BatchView.as_view(), name='api-batch'),
+    path('search/', SearchView.as_view(), name='api-search'),
     
     # authentication endpoints
     path('login/', obtain_auth_token, name='api-login'),
@@ -1,71 +1,207 @@
-from django.shortcuts import render
 from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
 
-from .models import Professor, Module, Rating
-from .serializers import ProfessorSerializer, ModuleSerializer, RatingSerializer, RegisterSerializer
+from .aggregates import average, professor_totals
+from .batch import AverageRatingLoader
+from .models import ArchiveCutoff, Professor, Module, Rating
+from .renderers import chunked, stream_compact, stream_json_list
+from .search import search
+from .serializers import RegisterSerializer
 
-from rest_framework import generics
 from rest_framework.generics import CreateAPIView
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
+RATING_LABELS = {
+    1: "Unbearable",
+    2: "Bad",
+    3: "Decent",
+    4: "Smart",
+    5: "Excellent"
+}
+
+MAX_BATCH_QUERIES = 50
+BATCH_PAGE_SIZE = 500  # list sub-queries of a batch return at most this many modules/professors
+MAX_SEARCH_RESULTS = 50
+LIST_CHUNK_SIZE = 500
+
+
+def iter_module_list(queryset=None):
+    """Module instances with their professors, read in chunks so the table is never fully in memory."""
+    queryset = Module.objects.all() if queryset is None else queryset
+    modules = queryset.prefetch_related("professors").order_by("id").iterator(chunk_size=LIST_CHUNK_SIZE)
+    for module in modules:
+        professors = module.professors.all()  # ManyToMany relation, prefetched per chunk
+        professor_list = [{"id": prof.id, "name": prof.name} for prof in professors]
+        yield {
+            "code": module.code,
+            "name": module.name,
+            "year": module.year,
+            "semester": module.semester,
+            "professors": professor_list
+        }
+
+
+def iter_professor_list(queryset=None):
+    """Professors with their average rating and modules, read in chunks."""
+    professor_ids = None if queryset is None else queryset.values_list("id", flat=True)
+    queryset = Professor.objects.all() if queryset is None else queryset
+    professors = queryset.prefetch_related("modules").order_by("id").iterator(chunk_size=LIST_CHUNK_SIZE)
+    totals = professor_totals(professor_ids)  # live ratings plus archived aggregates, one (count, total) per professor
+
+    for prof in professors:
+        avg = average(totals.get(prof.id, (0, 0)))
+        if avg is not None:
+            avg_rating = round(avg)  # Round to nearest integer
+            label = RATING_LABELS.get(avg_rating, "No ratings yet")
+            stars = "⭐" * avg_rating
+        else:
+            avg_rating = "No ratings yet"
+            label = avg_rating
+            stars = ""
+
+        # Modules the professor is teaching, prefetched per chunk
+        module_list = [{"code": mod.code, "name": mod.name} for mod in prof.modules.all()]
+
+        yield {
+            "id": prof.id,
+            "name": prof.name,
+            "average_rating": f"{stars} ({label})" if isinstance(avg_rating, int) else avg_rating,
+            "modules": module_list
+        }
+
+
+def module_list_data(queryset=None):
+    return list(iter_module_list(queryset))
+
+
+def professor_list_data(queryset=None):
+    return list(iter_professor_list(queryset))
+
+
+def _teaching_pairs(**filters):
+    """(professor_id, module_id) rows of the Module.professors relation, in one query."""
+    return Module.professors.through.objects.filter(**filters).values_list("professor_id", "module_id")
+
+
+MODULE_COMPACT_FIELDS = ["id", "code", "name", "year", "semester", "professors"]
+PROFESSOR_COMPACT_FIELDS = ["id", "name", "average", "count", "modules"]
+
+
+def iter_module_compact(queryset=None, referenced=None):
+    """Compact module rows, read in chunks; the professor ids they mention are added to `referenced`."""
+    queryset = Module.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("id").values_list("id", "code", "name", "year", "semester").iterator(chunk_size=LIST_CHUNK_SIZE)
+    for chunk in chunked(rows, LIST_CHUNK_SIZE):
+        teachers = {}
+        for professor_id, module_id in _teaching_pairs(module_id__in=[row[0] for row in chunk]):
+            teachers.setdefault(module_id, []).append(professor_id)
+        for module_id, code, name, year, semester in chunk:
+            professor_ids = teachers.get(module_id, [])
+            if referenced is not None:
+                referenced.update(professor_ids)
+            yield [module_id, code, name, year, semester, professor_ids]
+
+
+def iter_professor_compact(queryset=None, referenced=None):
+    """Compact professor rows, read in chunks; the module ids they mention are added to `referenced`."""
+    professor_ids = None if queryset is None else queryset.values_list("id", flat=True)
+    totals = professor_totals(professor_ids)  # live ratings plus archived aggregates
+    queryset = Professor.objects.all() if queryset is None else queryset
+    rows = queryset.order_by("id").values_list("id", "name").iterator(chunk_size=LIST_CHUNK_SIZE)
+    for chunk in chunked(rows, LIST_CHUNK_SIZE):
+        teaching = {}
+        for professor_id, module_id in _teaching_pairs(professor_id__in=[row[0] for row in chunk]):
+            teaching.setdefault(professor_id, []).append(module_id)
+        for prof_id, name in chunk:
+            count, total = totals.get(prof_id, (0, 0))
+            module_ids = teaching.get(prof_id, [])
+            if referenced is not None:
+                referenced.update(module_ids)
+            yield [prof_id, name, average((count, total)), count, module_ids]  # unrounded: clients round once, like the server
+
+
+def iter_professor_names(professor_ids):
+    """(id, name) of the given professors, looked up in chunks once the caller has collected the ids."""
+    for chunk in chunked(sorted(professor_ids), LIST_CHUNK_SIZE):
+        yield from Professor.objects.filter(id__in=chunk).order_by("id").values_list("id", "name")
+
+
+def iter_module_names(module_ids):
+    """(id, [code, name]) of the given modules, looked up in chunks."""
+    for chunk in chunked(sorted(module_ids), LIST_CHUNK_SIZE):
+        for module_id, code, name in Module.objects.filter(id__in=chunk).order_by("id").values_list("id", "code", "name"):
+            yield module_id, [code, name]
+
+
+def module_list_compact(queryset=None):
+    """Module rows with professor ids, plus an id -> name table of the professors referenced."""
+    referenced = set()
+    rows = list(iter_module_compact(queryset, referenced))
+    return {"fields": MODULE_COMPACT_FIELDS, "rows": rows, "professors": dict(iter_professor_names(referenced))}
+
+
+def professor_list_compact(queryset=None):
+    """Professor rows with numeric averages, rating counts and module ids, plus an id -> [code, name] module table."""
+    referenced = set()
+    rows = list(iter_professor_compact(queryset, referenced))
+    return {"fields": PROFESSOR_COMPACT_FIELDS, "rows": rows, "modules": dict(iter_module_names(referenced))}
+
+
+def batch_page_params(query):
+    """(after, limit) of a batch list query: the id cursor to start after and the page size."""
+    after = int(query.get("after") or 0)
+    limit = min(max(int(query.get("limit") or BATCH_PAGE_SIZE), 1), BATCH_PAGE_SIZE)
+    return after, limit
+
+
+def batch_page(model, after, limit):
+    """The next `limit` rows of model by id after the cursor, and the cursor of the following page (or None).
+
+    One query on the primary key finds the page's last id and whether anything follows it.
+    """
+    queryset = model.objects.filter(id__gt=after)
+    bounds = list(queryset.order_by("id").values_list("id", flat=True)[limit - 1:limit + 1])
+    if not bounds:
+        return queryset, None
+    return queryset.filter(id__lte=bounds[0]), bounds[0] if len(bounds) > 1 else None
+
+
+def wants_compact(request):
+    return getattr(request.accepted_renderer, "format", None) == "compact"
+
+
+def list_response(request, items):
+    """Stream plain JSON lists; the browsable API still gets a regular Response."""
+    if getattr(request.accepted_renderer, "format", None) == "json":
+        return StreamingHttpResponse(stream_json_list(items), content_type="application/json")
+    return Response(list(items))
+
+
+def compact_response(fields, rows, table_name, table):
+    """Stream a compact payload; `table` is only read after the rows, so it can be built from what they referenced."""
+    return StreamingHttpResponse(stream_compact(fields, rows, table_name, table), content_type="application/json")
+
+
 # Option 1: List all modules with professors
 class ModuleListView(APIView):
     def get(self, request):
-        modules = Module.objects.all()
-        data = []
-        for module in modules:
-            professors = module.professors.all()  # ManyToMany relation
-            professor_list = [{"id": prof.id, "name": prof.name} for prof in professors]
-            data.append({
-                "code": module.code,
-                "name": module.name,
-                "year": module.year,
-                "semester": module.semester,
-                "professors": professor_list
-            })
-        return Response(data)
+        if wants_compact(request):
+            referenced = set()
+            rows = iter_module_compact(referenced=referenced)
+            return compact_response(MODULE_COMPACT_FIELDS, rows, "professors", iter_professor_names(referenced))
+        return list_response(request, iter_module_list())
     
 # Option 2: List all professors and their ratings
 class ProfessorListView(APIView):
     def get(self, request):
-        professors = Professor.objects.all()
-        data = []
-        rating_labels = {
-            1: "Unbearable",
-            2: "Bad",
-            3: "Decent",
-            4: "Smart",
-            5: "Excellent"
-        }
-
-        for prof in professors:
-            ratings = prof.ratings.all()  # Reverse relationship
-            if ratings.exists():
-                avg_rating = round(sum(r.rating for r in ratings) / ratings.count())  # Round to nearest integer
-                label = rating_labels.get(avg_rating, "No ratings yet")
-                stars = "⭐" * avg_rating
-            else:
-                avg_rating = "No ratings yet"
-                label = avg_rating
-                stars = ""
-
-            # Fetch modules the professor is teaching
-            modules = prof.modules.all()  # Assuming ManyToMany relationship
-            module_list = [{"code": mod.code, "name": mod.name} for mod in modules]
-
-            data.append({
-                "id": prof.id,
-                "name": prof.name,
-                "average_rating": f"{stars} ({label})" if isinstance(avg_rating, int) else avg_rating,
-                "modules": module_list
-            })
-
-        return Response(data)
+        if wants_compact(request):
+            referenced = set()
+            rows = iter_professor_compact(referenced=referenced)
+            return compact_response(PROFESSOR_COMPACT_FIELDS, rows, "modules", iter_module_names(referenced))
+        return list_response(request, iter_professor_list())
 
 # Option 3: View ratings for a specific professor in a module
 class ProfessorRatingView(APIView):
@@ -73,47 +209,10 @@ class ProfessorRatingView(APIView):
         year = request.query_params.get("year")  # Get year from request
         semester = request.query_params.get("semester")  # Get semester from request
 
-        try:
-            professor = Professor.objects.get(id=professor_id)
-        except Professor.DoesNotExist:
-            return Response({"detail": "❌ Professor not found."}, status=404)
-
-        try:
-            module = Module.objects.get(code=module_code)
-        except Module.DoesNotExist:
-            return Response({"detail": "❌ Module not found."}, status=404)
-
-        # Apply filtering for year and semester
-        filters = {"professor": professor, "module": module}
-        if year:
-            filters["module__year"] = year
-        if semester:
-            filters["module__semester"] = semester
-
-        ratings = Rating.objects.filter(**filters)
-
-        if not ratings.exists():
-            return Response({
-                "professor_name": professor.name,
-                "professor_id": professor.id,
-                "module_name": module.name,
-                "module_code": module.code,
-                "average_rating": "No ratings yet"
-            })
-
-        # Calculate average rating
-        avg_rating = sum(r.rating for r in ratings) / ratings.count()
-        avg_rating = round(avg_rating)  # Round to nearest integer
-
-        return Response({
-            "professor_name": professor.name,
-            "professor_id": professor.id,
-            "module_name": module.name,
-            "module_code": module.code,
-            "year": year,
-            "semester": semester,
-            "average_rating": avg_rating  # Send numeric value
-        })
+        loader = AverageRatingLoader()
+        key = loader.load(professor_id, module_code, year, semester)
+        status, data = loader.resolve()[key]
+        return Response(data, status=status)
 
 # Option 4: Allow students to rate a professor
 class RateProfessorView(APIView):
@@ -145,6 +244,11 @@ class RateProfessorView(APIView):
         except Module.DoesNotExist:
             return Response({"detail": "❌ Module not found for the specified year and semester."}, status=404)
 
+        # Ratings for archived years are frozen, whether or not the module had any
+        closed_before = ArchiveCutoff.closed_before()
+        if closed_before is not None and module.year < closed_before:
+            return Response({"detail": f"❌ Ratings for {module.name} in {year} are closed."}, status=400)
+
         # Ensure the professor teaches this module
         if not module.professors.filter(id=professor.id).exists():
             return Response({
@@ -168,6 +272,95 @@ class RegisterView(CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny] # Registration is public
 
+# Prefix search over professor names and module names/codes
+class SearchView(APIView):
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"detail": "A search query (?q=) is required."}, status=400)
+
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), MAX_SEARCH_RESULTS)
+        except ValueError:
+            return Response({"detail": "Limit must be a number."}, status=400)
+
+        return Response({"query": query, "results": search(query, limit)})
+
+# Batched queries: resolve a whole screen of sub-requests in one round trip
+class BatchView(APIView):
+    def post(self, request):
+        # {"queries": [...]} or the bare list of sub-requests
+        data = request.data
+        queries = data.get("queries") if hasattr(data, "get") else data
+
+        if not isinstance(queries, list) or not queries:
+            return Response({"detail": "A non-empty list of queries is required."}, status=400)
+
+        if len(queries) > MAX_BATCH_QUERIES:
+            return Response({"detail": f"At most {MAX_BATCH_QUERIES} queries per batch."}, status=400)
+
+        loader = AverageRatingLoader()
+        plan = []
+        shared = {}  # identical list pages are computed once per batch
+
+        for query in queries:
+            query_type = query.get("type") if isinstance(query, dict) else None
+
+            if query_type in ("modules", "professors", "module_averages"):
+                try:
+                    after, limit = batch_page_params(query)
+                except (TypeError, ValueError):
+                    plan.append(("error", "After and limit must be numbers."))
+                    continue
+                compact = query_type != "module_averages" and query.get("format") == "compact"
+                key = (query_type, compact, after, limit)
+                if key not in shared:
+                    model = Professor if query_type == "professors" else Module
+                    page, next_after = batch_page(model, after, limit)
+                    if query_type == "module_averages":
+                        # Every (professor, module) pair taught in this page of modules, batched with the rest
+                        page = [
+                            loader.load(prof["id"], module["code"], module["year"], module["semester"])
+                            for module in iter_module_list(page)
+                            for prof in module["professors"]
+                        ]
+                    shared[key] = (page, next_after)
+                plan.append((query_type, key))
+            elif query_type == "average":
+                try:
+                    key = loader.load(query["professor"], query["module"], query.get("year"), query.get("semester"))
+                except (KeyError, TypeError, ValueError):
+                    plan.append(("error", "Average queries need a numeric professor, a module code and a plain year and semester."))
+                    continue
+                plan.append(("average", key))
+            else:
+                plan.append(("error", f"Unknown query type: {query_type!r}."))
+
+        averages = loader.resolve()
+        results = []
+        built = {}
+
+        for query_type, arg in plan:
+            if query_type in ("modules", "professors", "module_averages"):
+                if arg not in built:
+                    page, next_after = shared[arg]
+                    compact = arg[1]
+                    if query_type == "modules":
+                        data = module_list_compact(page) if compact else module_list_data(page)
+                    elif query_type == "professors":
+                        data = professor_list_compact(page) if compact else professor_list_data(page)
+                    else:
+                        data = [averages[key][1] for key in page]
+                    built[arg] = {"status": 200, "data": data, "next": next_after}
+                results.append(built[arg])
+            elif query_type == "average":
+                status, data = averages[arg]
+                results.append({"status": status, "data": data})
+            else:
+                results.append({"status": 400, "data": {"detail": arg}})
+
+        return Response({"results": results})
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -184,5 +377,7 @@ def api_root(request):
         'rate': '/api/rate/',
         'login': '/api/login/',
         'logout': '/api/logout/',
-        'register': '/api/register/'
+        'register': '/api/register/',
+        'batch': '/api/batch/',
+        'search': '/api/search/?q='
     })
\ No newline at end of file
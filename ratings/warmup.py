@@ -0,0 +1,75 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+from .aggregates import rebuild_store
+from .models import Professor, Module, Rating
+from .sharedstore import get_store
+
+logger = logging.getLogger(__name__)
+
+
+def _urls():
+    # Populates the resolver's reverse dictionaries and compiles every pattern
+    resolver = get_resolver()
+    reverse("api-root")
+    resolver.resolve("/api/")
+
+
+def _drf():
+    # DRF imports its renderer/auth/permission classes lazily on first access
+    from rest_framework.settings import api_settings
+
+    for name in ("DEFAULT_RENDERER_CLASSES", "DEFAULT_PARSER_CLASSES",
+                 "DEFAULT_AUTHENTICATION_CLASSES", "DEFAULT_PERMISSION_CLASSES"):
+        getattr(api_settings, name)
+    get_template("rest_framework/api.html")
+
+
+def _database():
+    # Opens the connection and touches each hot table through its primary key index.
+    # Bounded reads only: a COUNT(*) would scan million-row tables in every booting worker
+    connection.ensure_connection()
+    for model in (Professor, Module, Rating):
+        list(model.objects.order_by("-pk").values_list("pk", flat=True)[:1])
+
+
+def _aggregate_store():
+    # The first worker to start builds the shared store; the others find it ready
+    if get_store() is not None:
+        rebuild_store(force=False)
+
+
+WARMUP_STEPS = [
+    ("urls", _urls),
+    ("drf", _drf),
+    ("database", _database),
+    ("aggregate store", _aggregate_store),
+]
+
+
+def warm_up():
+    """Prime URL resolvers, DRF settings and the database before serving traffic.
+
+    A failing step is logged and skipped; it must never stop a worker from starting.
+    Returns {step: seconds} for the steps that ran.
+    """
+    timings = {}
+    if not getattr(settings, "RATINGS_WARMUP", True):
+        return timings
+
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.warning("Warm-up step %r failed", name, exc_info=True)
+            continue
+        timings[name] = time.perf_counter() - start
+
+    logger.info("Warm-up finished: %s", ", ".join(f"{name} {secs * 1000:.1f} ms" for name, secs in timings.items()))
+    return timings